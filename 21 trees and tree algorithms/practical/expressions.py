@@ -0,0 +1,227 @@
+import keyword
+import operator
+import re
+
+from utils import Stack, BinaryTree
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+# precedence, associativity and function of every binary operator
+OPERATORS = {
+    '+': (1, 'left', operator.add),
+    '-': (1, 'left', operator.sub),
+    '*': (2, 'left', operator.mul),
+    '/': (2, 'left', operator.truediv),
+    '**': (3, 'right', operator.pow),
+}
+
+TOKEN = re.compile(r'\s*(?:(\d+\.\d*|\.\d+|\d+)|([A-Za-z_]\w*)|(\*\*|[-+*/()^]))')
+
+# postfix instructions are (kind, argument) pairs
+CONST, LOAD, APPLY = 0, 1, 2
+
+
+def tokenize(expr):
+    """Split an infix expression into numbers, variable names, operators and parentheses."""
+    tokens = []
+    pos = 0
+    expr = expr.rstrip()
+    while pos < len(expr):
+        match = TOKEN.match(expr, pos)
+        if not match:
+            raise ValueError('unexpected character %r' % expr[pos:].lstrip()[0])
+        number, name, symbol = match.groups()
+        if number:
+            tokens.append(float(number) if '.' in number else int(number))
+        elif name:
+            if keyword.iskeyword(name):
+                raise ValueError('%s cannot be used as a variable name' % name)
+            tokens.append(name)
+        else:
+            tokens.append('**' if symbol == '^' else symbol)
+        pos = match.end()
+    return tokens
+
+
+def buildExpressionTree(expr):
+    """Parse an infix expression with variables into a BinaryTree.
+
+    Unlike buildParseTree the expression does not have to be fully
+    parenthesized: * and / bind tighter than + and -, ** (or ^) tighter still
+    and groups to the right. A unary minus is stored as 0 - operand. Leaves
+    hold numbers or variable names, inner nodes hold the operator.
+    """
+    operands = Stack()
+    ops = Stack()
+
+    def reduce():
+        op = ops.pop()
+        right = operands.pop()
+        left = operands.pop()
+        node = BinaryTree('-' if op == '-u' else op)
+        node.leftChild = left
+        node.rightChild = right
+        operands.push(node)
+
+    expectOperand = True
+    for token in tokenize(expr):
+        if expectOperand:
+            if token == '(':
+                ops.push(token)
+            elif token == '-':
+                # unary minus
+                operands.push(BinaryTree(0))
+                ops.push('-u')
+            elif token in OPERATORS or token == ')':
+                raise ValueError('expected a number or a variable before %s' % token)
+            else:
+                operands.push(BinaryTree(token))
+                expectOperand = False
+        elif token == ')':
+            while not ops.isEmpty() and ops.peek() != '(':
+                reduce()
+            if ops.isEmpty():
+                raise ValueError('unbalanced )')
+            ops.pop()
+        elif token in OPERATORS:
+            prec, assoc = OPERATORS[token][:2]
+            while not ops.isEmpty() and ops.peek() != '(':
+                top = precedence(ops.peek())
+                if top > prec or (top == prec and assoc == 'left'):
+                    reduce()
+                else:
+                    break
+            ops.push(token)
+            expectOperand = True
+        else:
+            raise ValueError('expected an operator before %s' % token)
+    if expectOperand:
+        raise ValueError('expression ends with an operator')
+    while not ops.isEmpty():
+        if ops.peek() == '(':
+            raise ValueError('unbalanced (')
+        reduce()
+    return operands.pop()
+
+
+def precedence(op):
+    # a unary minus binds tighter than * and / but looser than **
+    if op == '-u':
+        return 2.5
+    return OPERATORS[op][0]
+
+
+def evaluate(parseTree, env={}):
+    """Evaluate a tree node by node, looking variables up in env."""
+    leftC = parseTree.getLeftChild()
+    rightC = parseTree.getRightChild()
+
+    if leftC and rightC:
+        fn = OPERATORS[parseTree.getRootVal()][2]
+        return fn(evaluate(leftC, env), evaluate(rightC, env))
+    else:
+        val = parseTree.getRootVal()
+        return env[val] if isinstance(val, str) else val
+
+
+def toPostfix(tree):
+    """Flatten a tree into a list of (kind, argument) postfix instructions.
+
+    CONST pushes a number, LOAD pushes the value of a variable and APPLY pops
+    two values and pushes the result of the operator function.
+    """
+    program = []
+    stack = Stack()
+    stack.push((tree, False))
+    while not stack.isEmpty():
+        node, visited = stack.pop()
+        left = node.getLeftChild()
+        right = node.getRightChild()
+        if left and right and not visited:
+            stack.push((node, True))
+            stack.push((right, False))
+            stack.push((left, False))
+        elif left and right:
+            program.append((APPLY, OPERATORS[node.getRootVal()][2]))
+        elif isinstance(node.getRootVal(), str):
+            program.append((LOAD, node.getRootVal()))
+        else:
+            program.append((CONST, node.getRootVal()))
+    return program
+
+
+def runPostfix(program, env={}):
+    """Run a postfix program in one loop, no recursion and no tree walking."""
+    values = []
+    push = values.append
+    pop = values.pop
+    for kind, arg in program:
+        if kind == APPLY:
+            right = pop()
+            values[-1] = arg(values[-1], right)
+        elif kind == LOAD:
+            push(env[arg])
+        else:
+            push(arg)
+    return values[0]
+
+
+def toSource(tree):
+    """The expression as fully parenthesized Python source."""
+    names = {fn: op for op, (prec, assoc, fn) in OPERATORS.items()}
+    parts = []
+    for kind, arg in toPostfix(tree):
+        if kind == APPLY:
+            right = parts.pop()
+            parts[-1] = '(%s %s %s)' % (parts[-1], names[arg], right)
+        elif kind == LOAD:
+            parts.append(arg)
+        else:
+            parts.append(repr(arg))
+    return parts[0]
+
+
+class CompiledExpression:
+    """A parse tree compiled once and then evaluated many times.
+
+    The tree is turned into Python source and compiled to a code object, so
+    one evaluation is a single eval with no per-node Python calls. The same
+    code object evaluates whole columns at once: bound to numpy arrays the
+    operators work element by element.
+    """
+
+    def __init__(self, tree):
+        if isinstance(tree, str):
+            tree = buildExpressionTree(tree)
+        self.tree = tree
+        self.program = toPostfix(tree)
+        self.variables = sorted({arg for kind, arg in self.program if kind == LOAD})
+        self.source = toSource(tree)
+        self.code = compile(self.source, '<expression>', 'eval')
+        self.globals = {'__builtins__': {}}
+
+    def __call__(self, env={}):
+        return eval(self.code, self.globals, env)
+
+    def rows(self, rows):
+        """Values for a sequence of variable bindings (dicts), one per row."""
+        code = self.code
+        globs = self.globals
+        return [eval(code, globs, row) for row in rows]
+
+    def columns(self, columns):
+        """Evaluate over {variable: column} at once.
+
+        With numpy the columns are turned into arrays and the result is an
+        array; without it the rows are evaluated one at a time into a list.
+        """
+        if numpy is not None:
+            return eval(self.code, self.globals, {name: numpy.asarray(columns[name]) for name in self.variables})
+        names = self.variables
+        if not names:
+            return self()
+        return self.rows(dict(zip(names, row)) for row in zip(*[columns[name] for name in names]))
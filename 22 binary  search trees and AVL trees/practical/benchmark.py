@@ -0,0 +1,253 @@
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+from compact import CompactBinarySearchTree
+from concurrenttree import ConcurrentTree
+from sortedblocks import SortedBlockMap
+from utils import BinarySearchTree, AVLTree, TreeNode
+
+
+def timeIt(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def fill(tree, keys):
+    for k in keys:
+        tree.put(k,k)
+
+
+def lookupAll(tree, keys):
+    for k in keys:
+        tree.get(k)
+
+
+def heightBenchmark(sizes=(100, 500, 900, 10000, 100000)):
+    """Height and put/get time of BinarySearchTree and AVLTree on sorted and random keys.
+
+    A plain BinarySearchTree fed sorted keys degenerates into a list, its height
+    is n - 1 and filling it is quadratic, so it is only measured up to 10000 keys.
+    """
+    print('%-18s %-7s %8s %8s %10s %10s' % ('tree', 'keys', 'n', 'height', 'put s', 'get s'))
+    for n in sizes:
+        for order in ('sorted', 'random'):
+            keys = list(range(n))
+            if order == 'random':
+                random.shuffle(keys)
+            for cls in (BinarySearchTree, AVLTree):
+                if cls is BinarySearchTree and order == 'sorted' and n > 10000:
+                    continue
+                tree = cls()
+                putTime = timeIt(lambda: fill(tree, keys))
+                getTime = timeIt(lambda: lookupAll(tree, keys))
+                print('%-18s %-7s %8d %8d %10.4f %10.4f' % (cls.__name__, order, n, tree.height(), putTime, getTime))
+
+
+
+def traversalBenchmark(sizes=(1000, 10000, 50000)):
+    """Full inorder/preorder/postorder walks over a degenerate (sorted keys) tree.
+
+    The walks use an explicit stack, so the time grows linearly with n even
+    though the tree is n levels deep.
+    """
+    print('%8s %10s %10s %10s' % ('n', 'inorder s', 'preorder s', 'postorder s'))
+    for n in sizes:
+        tree = BinarySearchTree()
+        node = tree.root = TreeNode(0,0)
+        tree.size = n
+        # chain the nodes directly, filling a degenerate tree through put is quadratic
+        for k in range(1,n):
+            node.rightChild = TreeNode(k,k,parent=node)
+            node = node.rightChild
+        times = [timeIt(lambda: sum(1 for k in walk())) for walk in (tree.inorder, tree.preorder, tree.postorder)]
+        print('%8d %10.4f %10.4f %10.4f' % (n, times[0], times[1], times[2]))
+
+
+
+def bulkLoadBenchmark(sizes=(10000, 100000, 1000000)):
+    """Loading sorted (key, value) pairs with AVLTree.put versus from_sorted."""
+    print('%8s %12s %14s %8s' % ('n', 'put loop s', 'from_sorted s', 'height'))
+    for n in sizes:
+        items = [(k,k) for k in range(n)]
+        tree = AVLTree()
+        putTime = timeIt(lambda: [tree.put(k,v) for k, v in items])
+        bulkTime = timeIt(lambda: AVLTree.from_sorted(items))
+        print('%8d %12.4f %14.4f %8d' % (n, putTime, bulkTime, AVLTree.from_sorted(items).height()))
+
+
+def rangeBenchmark(n=100000, queries=1000, width=100):
+    """Narrow range queries with range/count_range versus filtering a full inorder walk."""
+    tree = AVLTree.from_sorted([(k,k) for k in range(n)])
+    starts = [random.randrange(n - width) for i in range(queries)]
+    rangeTime = timeIt(lambda: [list(tree.range(lo, lo + width)) for lo in starts])
+    countTime = timeIt(lambda: [tree.count_range(lo, lo + width) for lo in starts])
+    selectTime = timeIt(lambda: [tree.select(lo) for lo in starts])
+    scanStarts = starts[:10]
+    scanTime = timeIt(lambda: [[k for k in tree.inorder() if lo <= k <= lo + width] for lo in scanStarts])
+    print('%d keys, %d queries of width %d' % (n, queries, width))
+    print('%-24s %10.6f' % ('range per query s', rangeTime / queries))
+    print('%-24s %10.6f' % ('count_range per query s', countTime / queries))
+    print('%-24s %10.6f' % ('select per query s', selectTime / queries))
+    print('%-24s %10.6f' % ('full scan per query s', scanTime / len(scanStarts)))
+
+
+def memoryUsed(build):
+    """Bytes still allocated after build() returns, and the object it built."""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return after - before, result
+
+
+def memoryBenchmark(sizes=(10000, 100000, 1000000)):
+    """Memory per key and get time of BinarySearchTree versus CompactBinarySearchTree.
+
+    Both trees are built with from_sorted over the same int keys, the keys
+    and values themselves are shared so only the node storage is counted.
+    """
+    print('%-26s %8s %12s %10s' % ('tree', 'n', 'bytes/key', 'get s'))
+    for n in sizes:
+        items = [(k,k) for k in range(n)]
+        keys = list(range(n))
+        random.shuffle(keys)
+        for cls in (BinarySearchTree, CompactBinarySearchTree):
+            used, tree = memoryUsed(lambda: cls.from_sorted(items))
+            getTime = timeIt(lambda: lookupAll(tree, keys))
+            print('%-26s %8d %12.1f %10.4f' % (cls.__name__, n, used / n, getTime))
+
+
+def blockBenchmark(sizes=(10**5, 10**6, 10**7), treeLimit=10**6, queries=10000, width=100):
+    """Insert, lookup and range-scan throughput of AVLTree versus SortedBlockMap on random keys.
+
+    Rates are operations per second, for range scans keys returned per second.
+    An AVLTree of 10**7 TreeNodes takes gigabytes and minutes to fill, so
+    trees are only measured up to treeLimit keys.
+    """
+    print('%-16s %9s %12s %12s %12s' % ('map', 'n', 'put/s', 'get/s', 'range keys/s'))
+    for n in sizes:
+        keys = list(range(n))
+        random.shuffle(keys)
+        probes = keys[:queries]
+        starts = [random.randrange(n - width) for i in range(queries)]
+        for cls in (AVLTree, SortedBlockMap):
+            if cls is AVLTree and n > treeLimit:
+                continue
+            tree = cls()
+            putTime = timeIt(lambda: fill(tree, keys))
+            getTime = timeIt(lambda: lookupAll(tree, probes))
+            rangeTime = timeIt(lambda: [list(tree.range(lo, lo + width - 1)) for lo in starts])
+            print('%-16s %9d %12.0f %12.0f %12.0f' % (cls.__name__, n, n / putTime,
+                  queries / getTime, queries * width / rangeTime))
+
+
+def restartBenchmark(sizes=(10**5, 10**6), queries=10000):
+    """Rebuilding an AVLTree with put versus save and load, and lookups served off the mapped file."""
+    print('%8s %10s %8s %8s %10s %12s' % ('n', 'put loop s', 'save s', 'load s', 'open s', 'mapped get s'))
+    for n in sizes:
+        keys = list(range(n))
+        random.shuffle(keys)
+        tree = AVLTree()
+        putTime = timeIt(lambda: fill(tree, keys))
+        path = os.path.join(tempfile.mkdtemp(), 'tree.bst')
+        saveTime = timeIt(lambda: tree.save(path))
+        loadTime = timeIt(lambda: AVLTree.load(path))
+        start = time.perf_counter()
+        mapped = AVLTree.load(path, mapped=True)
+        openTime = time.perf_counter() - start
+        getTime = timeIt(lambda: lookupAll(mapped, keys[:queries]))
+        mapped.close()
+        os.remove(path)
+        print('%8d %10.3f %8.3f %8.3f %10.6f %12.4f' % (n, putTime, saveTime, loadTime, openTime, getTime))
+
+
+def checkTree(tree):
+    """Raise AssertionError unless every link, subtree size, balance factor and key order is right."""
+    heights = {}
+    count = 0
+    for node in postorderNodes(tree.root):
+        left = heights.get(id(node.leftChild), -1) if node.leftChild else -1
+        right = heights.get(id(node.rightChild), -1) if node.rightChild else -1
+        heights[id(node)] = 1 + max(left, right)
+        for child in (node.leftChild, node.rightChild):
+            assert child is None or child.parent is node, 'broken parent link'
+        assert node.size == 1 + (node.leftChild.size if node.leftChild else 0) \
+            + (node.rightChild.size if node.rightChild else 0), 'wrong subtree size'
+        if isinstance(tree, AVLTree):
+            assert node.balanceFactor == left - right, 'wrong balance factor'
+            assert -1 <= node.balanceFactor <= 1, 'unbalanced node'
+        count += 1
+    assert tree.root is None or tree.root.parent is None
+    assert count == tree.size == len(list(tree.inorder()))
+    keys = list(tree.inorder())
+    assert all(a < b for a, b in zip(keys, keys[1:])), 'keys out of order'
+
+
+def postorderNodes(root):
+    stack = [root] if root else []
+    out = []
+    while stack:
+        node = stack.pop()
+        out.append(node)
+        for child in (node.leftChild, node.rightChild):
+            if child:
+                stack.append(child)
+    return reversed(out)
+
+
+def stressConcurrent(workers=8, ops=20000, keySpace=5000):
+    """Hammer one ConcurrentTree from a thread pool and check it afterwards.
+
+    Worker w only writes keys k with k % workers == w and keeps its own dict of
+    what it wrote, so the final tree must equal the union of those dicts.
+    Every worker also reads other workers' keys and scans snapshots while
+    the others write; each snapshot must be strictly sorted.
+    """
+    shared = ConcurrentTree()
+
+    def work(w):
+        rng = random.Random(w)
+        mine = {}
+        for i in range(ops):
+            op = rng.random()
+            key = rng.randrange(keySpace // workers) * workers + w
+            if op < 0.4:
+                shared[key] = i
+                mine[key] = i
+            elif op < 0.6:
+                if key in mine:
+                    del shared[key]
+                    del mine[key]
+            elif op < 0.98:
+                shared.get(rng.randrange(keySpace))
+            else:
+                snap = [k for k, v in shared.items()]
+                assert all(a < b for a, b in zip(snap, snap[1:])), 'snapshot out of order'
+        return mine
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(workers) as pool:
+        expected = {}
+        for mine in pool.map(work, range(workers)):
+            expected.update(mine)
+    elapsed = time.perf_counter() - start
+    checkTree(shared.tree)
+    assert dict(shared.items()) == expected
+    print('%d workers x %d ops in %.3f s, %d keys, invariants ok' % (workers, ops, elapsed, len(shared)))
+
+
+if __name__ == '__main__':
+    heightBenchmark()
+    traversalBenchmark()
+    bulkLoadBenchmark()
+    rangeBenchmark()
+    memoryBenchmark()
+    blockBenchmark()
+    restartBenchmark()
+    stressConcurrent()
@@ -0,0 +1,227 @@
+from array import array
+from collections.abc import MutableMapping
+
+from utils import BinarySearchTree
+
+
+NIL = -1
+
+
+class CompactBinarySearchTree(MutableMapping):
+    """A BinarySearchTree whose nodes live in parallel arrays instead of TreeNode objects.
+
+    Node i is slotKeys[i], slotValues[i] with its links stored as int indices in
+    left[i], right[i] and parent[i] (NIL when missing). Slots freed by delete
+    are kept on a free list and reused by the next put, so a tree that is
+    updated in place does not keep growing its arrays.
+    """
+
+    def __init__(self):
+        self.slotKeys = []
+        self.slotValues = []
+        self.left = array('l')
+        self.right = array('l')
+        self.parent = array('l')
+        self.free = []
+        self.root = NIL
+        self.size = 0
+
+    @classmethod
+    def from_sorted(cls,items):
+        """Build a balanced tree in O(n) from (key, value) pairs in strictly ascending key order."""
+        tree = cls()
+        items = list(items)
+        for i in range(1,len(items)):
+            if not items[i-1][0] < items[i][0]:
+                raise ValueError('keys must be in strictly ascending order')
+        tree._buildBalanced(items)
+        return tree
+
+    @classmethod
+    def from_iterable(cls,items):
+        """Build a balanced tree from a dict or (key, value) pairs in any order, the last value of a key wins."""
+        return cls.from_sorted(BinarySearchTree._sortedUnique(items))
+
+    def _buildBalanced(self,items):
+        # the slot of a node is its position in the sorted items, so the arrays
+        # are filled in order and every link is computed from the ranges
+        n = len(items)
+        self.slotKeys = [key for key, val in items]
+        self.slotValues = [val for key, val in items]
+        self.left = array('l',[NIL]) * n
+        self.right = array('l',[NIL]) * n
+        self.parent = array('l',[NIL]) * n
+        self.size = n
+        if n == 0:
+            return
+        self.root = (n - 1) // 2
+        stack = [(0,n,NIL)]
+        while stack:
+            lo, hi, up = stack.pop()
+            mid = (lo + hi - 1) // 2
+            self.parent[mid] = up
+            if lo < mid:
+                self.left[mid] = (lo + mid - 1) // 2
+                stack.append((lo,mid,mid))
+            if mid + 1 < hi:
+                self.right[mid] = (mid + hi) // 2
+                stack.append((mid+1,hi,mid))
+
+    def _newNode(self,key,val,up):
+        if self.free:
+            i = self.free.pop()
+            self.slotKeys[i] = key
+            self.slotValues[i] = val
+            self.left[i] = NIL
+            self.right[i] = NIL
+            self.parent[i] = up
+        else:
+            i = len(self.slotKeys)
+            self.slotKeys.append(key)
+            self.slotValues.append(val)
+            self.left.append(NIL)
+            self.right.append(NIL)
+            self.parent.append(up)
+        return i
+
+    def put(self,key,val):
+        if self.root == NIL:
+            self.root = self._newNode(key,val,NIL)
+            self.size = 1
+            return
+        i = self.root
+        while True:
+            if key == self.slotKeys[i]:
+                self.slotValues[i] = val
+                return
+            if key < self.slotKeys[i]:
+                if self.left[i] == NIL:
+                    self.left[i] = self._newNode(key,val,i)
+                    break
+                i = self.left[i]
+            else:
+                if self.right[i] == NIL:
+                    self.right[i] = self._newNode(key,val,i)
+                    break
+                i = self.right[i]
+        self.size = self.size + 1
+
+    def __setitem__(self,k,v):
+        self.put(k,v)
+
+    def _find(self,key):
+        i = self.root
+        while i != NIL:
+            if key == self.slotKeys[i]:
+                return i
+            elif key < self.slotKeys[i]:
+                i = self.left[i]
+            else:
+                i = self.right[i]
+        return NIL
+
+    def get(self,key,default=None):
+        i = self._find(key)
+        if i == NIL:
+            return default
+        return self.slotValues[i]
+
+    def __getitem__(self,key):
+        i = self._find(key)
+        if i == NIL:
+            raise KeyError(key)
+        return self.slotValues[i]
+
+    def __contains__(self,key):
+        return self._find(key) != NIL
+
+    def length(self):
+        return self.size
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        return self.inorder()
+
+    def clear(self):
+        self.__init__()
+
+    def delete(self,key):
+        i = self._find(key)
+        if i == NIL:
+            raise KeyError('Error, key not in tree')
+        if self.left[i] != NIL and self.right[i] != NIL:
+            # move the successor into this slot and unlink the successor instead
+            succ = self.right[i]
+            while self.left[succ] != NIL:
+                succ = self.left[succ]
+            self.slotKeys[i] = self.slotKeys[succ]
+            self.slotValues[i] = self.slotValues[succ]
+            i = succ
+        self._unlink(i)
+        self.size = self.size - 1
+
+    def __delitem__(self,key):
+        self.delete(key)
+
+    def _unlink(self,i):
+        # i has at most one child, which takes its place
+        child = self.left[i] if self.left[i] != NIL else self.right[i]
+        up = self.parent[i]
+        if child != NIL:
+            self.parent[child] = up
+        if up == NIL:
+            self.root = child
+        elif self.left[up] == i:
+            self.left[up] = child
+        else:
+            self.right[up] = child
+        self.slotKeys[i] = None
+        self.slotValues[i] = None
+        self.free.append(i)
+
+    def height(self):
+        """Number of edges on the longest root to leaf path, -1 for an empty tree."""
+        if self.root == NIL:
+            return -1
+        best = 0
+        stack = [(self.root,0)]
+        while stack:
+            i, depth = stack.pop()
+            best = max(best,depth)
+            if self.left[i] != NIL:
+                stack.append((self.left[i],depth+1))
+            if self.right[i] != NIL:
+                stack.append((self.right[i],depth+1))
+        return best
+
+    def inorder(self,items=False):
+        stack = []
+        i = self.root
+        while stack or i != NIL:
+            if i != NIL:
+                stack.append(i)
+                i = self.left[i]
+            else:
+                i = stack.pop()
+                yield (self.slotKeys[i],self.slotValues[i]) if items else self.slotKeys[i]
+                i = self.right[i]
+
+    def range(self,lo,hi,items=False):
+        """Keys (or (key, value) pairs) with lo <= key <= hi, in order."""
+        stack = []
+        i = self.root
+        while stack or i != NIL:
+            if i != NIL:
+                if self.slotKeys[i] < lo:
+                    i = self.right[i]
+                else:
+                    stack.append(i)
+                    i = self.left[i]
+            else:
+                i = stack.pop()
+                if hi < self.slotKeys[i]:
+                    return
+                yield (self.slotKeys[i],self.slotValues[i]) if items else self.slotKeys[i]
+                i = self.right[i]
@@ -0,0 +1,235 @@
+import threading
+from bisect import bisect_left
+from collections.abc import ItemsView, Mapping, MutableMapping, ValuesView
+from contextlib import contextmanager
+
+from utils import AVLTree
+
+
+class ReadWriteLock:
+    """Any number of readers or a single writer.
+
+    Waiting writers go first: once a writer is waiting, new readers queue
+    behind it so a steady stream of reads cannot starve the writes.
+    """
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.readers = 0
+        self.writer = False
+        self.waitingWriters = 0
+
+    def acquireRead(self):
+        with self.condition:
+            while self.writer or self.waitingWriters:
+                self.condition.wait()
+            self.readers += 1
+
+    def releaseRead(self):
+        with self.condition:
+            self.readers -= 1
+            if self.readers == 0:
+                self.condition.notify_all()
+
+    def acquireWrite(self):
+        with self.condition:
+            self.waitingWriters += 1
+            while self.writer or self.readers:
+                self.condition.wait()
+            self.waitingWriters -= 1
+            self.writer = True
+
+    def releaseWrite(self):
+        with self.condition:
+            self.writer = False
+            self.condition.notify_all()
+
+    @contextmanager
+    def reading(self):
+        self.acquireRead()
+        try:
+            yield
+        finally:
+            self.releaseRead()
+
+    @contextmanager
+    def writing(self):
+        self.acquireWrite()
+        try:
+            yield
+        finally:
+            self.releaseWrite()
+
+
+class SnapshotItemsView(ItemsView):
+    def __iter__(self):
+        return zip(self._mapping.sortedKeys,self._mapping.sortedValues)
+
+
+class SnapshotValuesView(ValuesView):
+    def __iter__(self):
+        return iter(self._mapping.sortedValues)
+
+
+class Snapshot(Mapping):
+    """A read-only copy of a tree at one instant, keys in sorted order.
+
+    Lookups bisect the sorted keys, so nothing needs to be hashable.
+    """
+
+    def __init__(self,pairs):
+        self.sortedKeys = tuple(key for key, val in pairs)
+        self.sortedValues = tuple(val for key, val in pairs)
+
+    def __getitem__(self,key):
+        i = bisect_left(self.sortedKeys,key)
+        if i < len(self.sortedKeys) and self.sortedKeys[i] == key:
+            return self.sortedValues[i]
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(self.sortedKeys)
+
+    def __len__(self):
+        return len(self.sortedKeys)
+
+    def items(self):
+        return SnapshotItemsView(self)
+
+    def values(self):
+        return SnapshotValuesView(self)
+
+
+class ConcurrentTree(MutableMapping):
+    """A tree that can be shared between threads.
+
+    Lookups take the read lock and run side by side, put and delete take the
+    write lock. Iteration never walks the live tree: it runs over a snapshot
+    of the tree taken under the read lock. The snapshot is kept until the
+    next write, so repeated scans between writes share one copy. keys(),
+    items() and values() are views of one snapshot and do not follow later
+    writes.
+    Queries that return several keys (range) return lists for the same reason.
+    """
+
+    def __init__(self,tree=None):
+        self.tree = tree if tree is not None else AVLTree()
+        self.lock = ReadWriteLock()
+        self._snapshot = None
+
+    def _changed(self):
+        # called with the write lock held
+        self._snapshot = None
+
+    def snapshot(self):
+        """A read-only Snapshot mapping of the tree as it was at one instant."""
+        snap = self._snapshot
+        if snap != None:
+            return snap
+        with self.lock.reading():
+            if self._snapshot == None:
+                self._snapshot = Snapshot(list(self.tree.inorder(items=True)))
+            return self._snapshot
+
+    def put(self,key,val):
+        with self.lock.writing():
+            self.tree.put(key,val)
+            self._changed()
+
+    def __setitem__(self,k,v):
+        self.put(k,v)
+
+    def get(self,key,default=None):
+        with self.lock.reading():
+            return self.tree.get(key,default)
+
+    def __getitem__(self,key):
+        with self.lock.reading():
+            return self.tree[key]
+
+    def __contains__(self,key):
+        with self.lock.reading():
+            return key in self.tree
+
+    def __len__(self):
+        return len(self.tree)
+
+    def delete(self,key):
+        with self.lock.writing():
+            self.tree.delete(key)
+            self._changed()
+
+    def __delitem__(self,key):
+        self.delete(key)
+
+    def pop(self,key,*default):
+        with self.lock.writing():
+            if key not in self.tree and default:
+                return default[0]
+            val = self.tree.pop(key)
+            self._changed()
+            return val
+
+    def popitem(self):
+        """Remove and return the (key, value) pair with the smallest key."""
+        with self.lock.writing():
+            if len(self.tree) == 0:
+                raise KeyError('popitem(): tree is empty')
+            key = next(iter(self.tree))
+            val = self.tree.pop(key)
+            self._changed()
+            return key, val
+
+    def setdefault(self,key,default=None):
+        with self.lock.writing():
+            if key in self.tree:
+                return self.tree[key]
+            self.tree.put(key,default)
+            self._changed()
+            return default
+
+    def update(self,other=(),**kwds):
+        with self.lock.writing():
+            self.tree.update(other,**kwds)
+            self._changed()
+
+    def clear(self):
+        with self.lock.writing():
+            self.tree.clear()
+            self._changed()
+
+    def __iter__(self):
+        return iter(self.snapshot())
+
+    def keys(self):
+        return self.snapshot().keys()
+
+    def items(self):
+        return self.snapshot().items()
+
+    def values(self):
+        return self.snapshot().values()
+
+    def range(self,lo,hi,items=False):
+        with self.lock.reading():
+            return list(self.tree.range(lo,hi,items))
+
+    def select(self,k):
+        with self.lock.reading():
+            return self.tree.select(k)
+
+    def rank(self,key):
+        with self.lock.reading():
+            return self.tree.rank(key)
+
+    def count_range(self,lo,hi):
+        with self.lock.reading():
+            return self.tree.count_range(lo,hi)
+
+    def floor(self,key):
+        with self.lock.reading():
+            return self.tree.floor(key)
+
+    def ceiling(self,key):
+        with self.lock.reading():
+            return self.tree.ceiling(key)
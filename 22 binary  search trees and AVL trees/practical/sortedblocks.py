@@ -0,0 +1,206 @@
+from bisect import bisect_left, bisect_right
+from collections.abc import MutableMapping
+
+from utils import BinarySearchTree, TreeItemsView, TreeValuesView
+
+
+class SortedBlockMap(MutableMapping):
+    """An ordered mapping kept as a short list of sorted blocks.
+
+    The keys live in blocks of at most 2 * load keys, every key of a block is
+    smaller than every key of the next one and maxes[b] is the last key of
+    block b. A lookup bisects maxes to find the block and then bisects inside
+    it, so there are two binary searches over flat lists instead of one
+    pointer per tree level. Blocks split when they grow past 2 * load and are
+    merged with a neighbour when they shrink below load // 2.
+
+    Same API as BinarySearchTree: put/get, [], in, len, delete, inorder and
+    range, in sorted key order.
+    """
+
+    def __init__(self,load=1000):
+        self.load = load
+        self.blocks = []
+        self.blockValues = []
+        self.maxes = []
+        self.size = 0
+
+    @classmethod
+    def from_sorted(cls,items,load=1000):
+        """Build from (key, value) pairs in strictly ascending key order in O(n)."""
+        items = list(items)
+        for i in range(1,len(items)):
+            if not items[i-1][0] < items[i][0]:
+                raise ValueError('keys must be in strictly ascending order')
+        tree = cls(load)
+        tree._fill(items)
+        return tree
+
+    @classmethod
+    def from_iterable(cls,items,load=1000):
+        """Build from a dict or (key, value) pairs in any order, the last value of a key wins."""
+        return cls.from_sorted(BinarySearchTree._sortedUnique(items),load)
+
+    def _fill(self,items):
+        for start in range(0,len(items),self.load):
+            chunk = items[start:start+self.load]
+            self.blocks.append([key for key, val in chunk])
+            self.blockValues.append([val for key, val in chunk])
+            self.maxes.append(chunk[-1][0])
+        self.size = len(items)
+
+    def _locate(self,key):
+        # (block, index) of key, or None when it is not in the map
+        b = bisect_left(self.maxes,key)
+        if b == len(self.maxes):
+            return None
+        keys = self.blocks[b]
+        i = bisect_left(keys,key)
+        if keys[i] == key:
+            return b, i
+        return None
+
+    def put(self,key,val):
+        if not self.maxes:
+            self.blocks.append([key])
+            self.blockValues.append([val])
+            self.maxes.append(key)
+            self.size = 1
+            return
+        b = bisect_left(self.maxes,key)
+        if b == len(self.maxes):
+            # bigger than every key, it goes at the end of the last block
+            b = b - 1
+        keys = self.blocks[b]
+        i = bisect_left(keys,key)
+        if i < len(keys) and keys[i] == key:
+            self.blockValues[b][i] = val
+            return
+        keys.insert(i,key)
+        self.blockValues[b].insert(i,val)
+        if i == len(keys) - 1:
+            self.maxes[b] = key
+        self.size = self.size + 1
+        if len(keys) > 2 * self.load:
+            self._split(b)
+
+    def __setitem__(self,k,v):
+        self.put(k,v)
+
+    def _split(self,b):
+        keys = self.blocks[b]
+        values = self.blockValues[b]
+        half = len(keys) // 2
+        self.blocks.insert(b+1,keys[half:])
+        self.blockValues.insert(b+1,values[half:])
+        del keys[half:]
+        del values[half:]
+        self.maxes.insert(b+1,self.maxes[b])
+        self.maxes[b] = keys[-1]
+
+    def get(self,key,default=None):
+        loc = self._locate(key)
+        if loc == None:
+            return default
+        return self.blockValues[loc[0]][loc[1]]
+
+    def __getitem__(self,key):
+        loc = self._locate(key)
+        if loc == None:
+            raise KeyError(key)
+        return self.blockValues[loc[0]][loc[1]]
+
+    def __contains__(self,key):
+        return self._locate(key) != None
+
+    def length(self):
+        return self.size
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        return self.inorder()
+
+    def delete(self,key):
+        loc = self._locate(key)
+        if loc == None:
+            raise KeyError('Error, key not in tree')
+        b, i = loc
+        keys = self.blocks[b]
+        del keys[i]
+        del self.blockValues[b][i]
+        self.size = self.size - 1
+        if not keys:
+            del self.blocks[b]
+            del self.blockValues[b]
+            del self.maxes[b]
+            return
+        if i == len(keys):
+            self.maxes[b] = keys[-1]
+        if len(keys) < self.load // 2 and len(self.blocks) > 1:
+            self._merge(b)
+
+    def __delitem__(self,key):
+        self.delete(key)
+
+    def _merge(self,b):
+        # fold block b into its neighbour, splitting again if that made it too big
+        if b == len(self.blocks) - 1:
+            b = b - 1
+        self.blocks[b].extend(self.blocks[b+1])
+        self.blockValues[b].extend(self.blockValues[b+1])
+        self.maxes[b] = self.maxes[b+1]
+        del self.blocks[b+1]
+        del self.blockValues[b+1]
+        del self.maxes[b+1]
+        if len(self.blocks[b]) > 2 * self.load:
+            self._split(b)
+
+    def update(self,other=(),**kwds):
+        """Put every pair of a mapping or iterable, an empty map is bulk loaded instead."""
+        if self.size == 0:
+            merged = dict(other)
+            merged.update(kwds)
+            self.clear()
+            self._fill(sorted(merged.items()))
+        else:
+            MutableMapping.update(self,other,**kwds)
+
+    def items(self):
+        return TreeItemsView(self)
+
+    def values(self):
+        return TreeValuesView(self)
+
+    def clear(self):
+        self.blocks = []
+        self.blockValues = []
+        self.maxes = []
+        self.size = 0
+
+    def inorder(self,items=False):
+        """Keys (or (key, value) pairs when items is set) in sorted order."""
+        for keys, values in zip(self.blocks,self.blockValues):
+            if items:
+                yield from zip(keys,values)
+            else:
+                yield from keys
+
+    def range(self,lo,hi,items=False):
+        """Keys (or (key, value) pairs) with lo <= key <= hi, in order."""
+        b = bisect_left(self.maxes,lo)
+        if b == len(self.maxes):
+            return
+        i = bisect_left(self.blocks[b],lo)
+        while b < len(self.blocks):
+            keys = self.blocks[b]
+            j = bisect_right(keys,hi)
+            if items:
+                yield from zip(keys[i:j],self.blockValues[b][i:j])
+            else:
+                yield from keys[i:j]
+            if j < len(keys):
+                return
+            b = b + 1
+            i = 0
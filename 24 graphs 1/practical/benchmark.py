@@ -0,0 +1,122 @@
+import random
+import sys
+import time
+
+from utils import Graph, Queue
+from wordladder import buildGraph, ladder
+
+
+def timeIt(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def randomWords(n, seed=0):
+    """n distinct made-up words of 4 to 8 letters from a small alphabet, so most have neighbours."""
+    rng = random.Random(seed)
+    words = set()
+    while len(words) < n:
+        length = rng.randint(4, 8)
+        words.add(''.join(rng.choice('ABCDEHILMNOPRST') for i in range(length)))
+    return [w + '\n' for w in words]
+
+
+def ladderBenchmark(n=150000, queries=100):
+    """Building the bucket graph from a streamed word list and answering ladder queries."""
+    lines = randomWords(n)
+    graphs = []
+    buildTime = timeIt(lambda: graphs.append(buildGraph(iter(lines))))
+    g = graphs[0]
+    edges = sum(len(v.getConnections()) for v in g)
+    rng = random.Random(1)
+    words = [line.strip() for line in lines]
+    pairs = []
+    for i in range(queries):
+        length = rng.randint(4, 8)
+        same = [w for w in rng.sample(words, 2000) if len(w) == length]
+        pairs.append((same[0], same[1]))
+    found = []
+    queryTime = timeIt(lambda: found.extend(ladder(g, a, b) for a, b in pairs))
+    print('%d words, %d edges, build %.2f s' % (g.numVertices, edges, buildTime))
+    print('%d ladder queries in %.3f s, %d connected, longest %d words' % (
+        queries, queryTime, sum(1 for p in found if p), max(len(p) for p in found)))
+
+
+class ListQueue(Queue):
+    """The queue as it was, on a list, insert(0,item) moves every item already queued."""
+
+    def __init__(self):
+        self.items = []
+
+    def isEmpty(self):
+        return self.items == []
+
+    def enqueue(self, item):
+        self.items.insert(0,item)
+
+
+def bfs(g,start,queue=Queue):
+    # the practical's bfs, with the queue class as a parameter
+    start.setDistance(0)
+    start.setPred(None)
+    vertQueue = queue()
+    vertQueue.enqueue(start)
+    while (vertQueue.size() > 0):
+        currentVert = vertQueue.dequeue()
+        for nbr in currentVert.getConnections():
+            if (nbr.getColor() == 'white'):
+                nbr.setColor('gray')
+                nbr.setDistance(currentVert.getDistance() + 1)
+                nbr.setPred(currentVert)
+                vertQueue.enqueue(nbr)
+        currentVert.setColor('black')
+
+
+def reset(g):
+    for v in g:
+        v.setColor('white')
+        v.setDistance(sys.maxsize)
+        v.setPred(None)
+
+
+def wideGraph(n, degree=3, seed=0):
+    """A random graph with a path through all n vertices plus random edges, so frontiers get wide."""
+    rng = random.Random(seed)
+    g = Graph()
+    for v in range(n):
+        if v + 1 < n:
+            g.addEdge(v, v + 1)
+            g.addEdge(v + 1, v)
+        for i in range(degree - 1):
+            w = rng.randrange(n)
+            g.addEdge(v, w)
+            g.addEdge(w, v)
+    return g
+
+
+def bfsBenchmark(sizes=(10**4, 10**5, 10**6), listLimit=10**5):
+    """BFS time with the old list queue, the deque Queue and Graph.bfs.
+
+    The list queue is quadratic in the frontier size, so it is only run up
+    to listLimit vertices. Time per vertex should stay flat for the others.
+    """
+    print('%-14s %8s %10s %14s' % ('bfs', 'n', 'seconds', 'us per vertex'))
+    for n in sizes:
+        g = wideGraph(n)
+        start = g.getVertex(0)
+        runs = [('list queue', lambda: bfs(g, start, ListQueue)),
+                ('deque Queue', lambda: bfs(g, start, Queue)),
+                ('Graph.bfs', lambda: g.bfs(start))]
+        for name, run in runs:
+            if name == 'list queue' and n > listLimit:
+                continue
+            reset(g)
+            seconds = timeIt(run)
+            assert all(v.getColor() == 'black' for v in g)
+            print('%-14s %8d %10.3f %14.2f' % (name, n, seconds, seconds / n * 1e6))
+
+
+if __name__ == '__main__':
+    ladderBenchmark()
+    bfsBenchmark()
@@ -1,6 +1,7 @@
 import sys
 import os
 import unittest
+from collections import deque
 
 class Graph:
     def __init__(self):
@@ -34,6 +35,37 @@ class Graph:
         
     def __iter__(self):
         return iter(self.vertices.values())
+
+    def bfs(self,start):
+        """Level-synchronous breadth first search from start (a Vertex or a key).
+
+        Sets color, distance and predecessor of every vertex like the
+        practical's bfs, but works through the graph one whole frontier at a
+        time with plain lists instead of a queue. Returns the number of levels.
+        """
+        if not isinstance(start,Vertex):
+            start = self.vertices[start]
+        for v in self:
+            v.color = 'white'
+            v.dist = sys.maxsize
+            v.pred = None
+        start.color = 'gray'
+        start.dist = 0
+        frontier = [start]
+        level = 0
+        while frontier:
+            level = level + 1
+            nextFrontier = []
+            for currentVert in frontier:
+                for nbr in currentVert.connectedTo:
+                    if nbr.color == 'white':
+                        nbr.color = 'gray'
+                        nbr.dist = level
+                        nbr.pred = currentVert
+                        nextFrontier.append(nbr)
+                currentVert.color = 'black'
+            frontier = nextFrontier
+        return level
                 
 class Vertex:
     def __init__(self,num):
@@ -111,14 +143,15 @@ class adjGraphTests(unittest.TestCase):
 
 
 class Queue:
+    # a deque makes both ends O(1), a list paid O(n) for every insert(0,item)
     def __init__(self):
-        self.items = []
+        self.items = deque()
 
     def isEmpty(self):
-        return self.items == []
+        return not self.items
     
     def enqueue(self, item):
-        self.items.insert(0,item)
+        self.items.appendleft(item)
 
     def dequeue(self):
         return self.items.pop()
@@ -0,0 +1,110 @@
+from utils import Graph
+
+
+def readWords(source):
+    """Yield the words of a file name or of any iterable of lines, one at a time.
+
+    Surrounding whitespace is stripped and blank lines are skipped, so the
+    last word survives a file without a final newline.
+    """
+    if isinstance(source, str):
+        with open(source, 'r') as wfile:
+            for line in wfile:
+                word = line.strip()
+                if word:
+                    yield word
+    else:
+        for line in source:
+            word = line.strip()
+            if word:
+                yield word
+
+
+def bucketIndex(words):
+    """Group words by wildcard bucket: 'POPE' goes into '_OPE', 'P_PE', 'PO_E' and 'POP_'.
+
+    Two words are one letter apart exactly when they share a bucket, and
+    they share only that one. Words of any length can be mixed since a
+    bucket keeps the length of its words. Repeated words are ignored.
+    """
+    d = {}
+    seen = set()
+    for word in words:
+        if word in seen:
+            continue
+        seen.add(word)
+        for i in range(len(word)):
+            bucket = word[:i] + '_' + word[i+1:]
+            if bucket in d:
+                d[bucket].append(word)
+            else:
+                d[bucket] = [word]
+    return seen, d
+
+
+def buildGraph(source):
+    """Word-ladder Graph of the words in source (a file name or an iterable of lines).
+
+    Edges are only generated between words of the same bucket, each pair once
+    in each direction, so the work is the number of edges rather than every
+    pair of words. Every word gets a vertex, even one without neighbours.
+    """
+    words, d = bucketIndex(readWords(source))
+    g = Graph()
+    for word in words:
+        g.addVertex(word)
+    for bucket in d.values():
+        for i in range(len(bucket)):
+            for j in range(i + 1, len(bucket)):
+                g.addEdge(bucket[i], bucket[j])
+                g.addEdge(bucket[j], bucket[i])
+    return g
+
+
+def ladder(g, start, end):
+    """Shortest list of words leading from start to end in g, [] when there is none.
+
+    Searches from both ends at once, always growing the smaller frontier by a
+    whole level, so it usually looks at far fewer words than a plain BFS from
+    start. The Vertex color/dist/pred fields are not touched.
+    """
+    if start not in g or end not in g:
+        raise KeyError('%s is not in the graph' % (end if start in g else start))
+    if start == end:
+        return [start]
+    # for each side: the distance and the predecessor towards its own end
+    sides = [({start: 0}, {start: None}, [start]), ({end: 0}, {end: None}, [end])]
+    while sides[0][2] and sides[1][2]:
+        side = 0 if len(sides[0][2]) <= len(sides[1][2]) else 1
+        dist, pred, frontier = sides[side]
+        otherDist = sides[1 - side][0]
+        best = None
+        nextFrontier = []
+        for key in frontier:
+            for nbr in g.getVertex(key).getConnections():
+                nbrKey = nbr.getId()
+                if nbrKey in dist:
+                    continue
+                dist[nbrKey] = dist[key] + 1
+                pred[nbrKey] = key
+                nextFrontier.append(nbrKey)
+                if nbrKey in otherDist and (best == None or otherDist[nbrKey] < otherDist[best]):
+                    best = nbrKey
+        if best != None:
+            return joinPaths(sides[0][1], sides[1][1], best)
+        sides[side] = (dist, pred, nextFrontier)
+    return []
+
+
+def joinPaths(startPred, endPred, meet):
+    path = []
+    key = meet
+    while key != None:
+        path.append(key)
+        key = startPred[key]
+    path.reverse()
+    key = endPred[meet]
+    while key != None:
+        path.append(key)
+        key = endPred[key]
+    return path
@@ -0,0 +1,171 @@
+import random
+import sys
+import time
+import tracemalloc
+from collections import deque
+
+import traversal
+from csr import CSRGraph
+from utils import Graph, PriorityQueue
+
+
+class ScanningPriorityQueue(PriorityQueue):
+    """The queue before the position map: decreaseKey and `in` scan the heap."""
+
+    def decreaseKey(self,val,amt):
+        for i in range(1,self.currentSize+1):
+            if self.heapArray[i][1] == val:
+                self.heapArray[i] = (amt,val)
+                self.percUp(i)
+                return
+
+    def __contains__(self,vtx):
+        for pair in self.heapArray:
+            if pair[1] == vtx:
+                return True
+        return False
+
+
+def timeIt(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def randomGraph(n, degree=4, seed=0):
+    """n vertices in a ring (so every vertex is reachable) plus random weighted edges, both directions."""
+    rng = random.Random(seed)
+    g = Graph()
+    for v in range(n):
+        for w in [(v + 1) % n] + [rng.randrange(n) for i in range(degree - 1)]:
+            cost = rng.randint(1, 100)
+            g.addEdge(v, w, cost)
+            g.addEdge(w, v, cost)
+    return g
+
+
+def reset(g):
+    for v in g:
+        v.setDistance(sys.maxsize)
+        v.setPred(None)
+
+
+def dijkstra(aGraph,start,queue=PriorityQueue):
+    pq = queue()
+    start.setDistance(0)
+    pq.buildHeap([(v.getDistance(),v) for v in aGraph])
+    while not pq.isEmpty():
+        currentVert = pq.delMin()
+        for nextVert in currentVert.getConnections():
+            newDist = currentVert.getDistance() + currentVert.getWeight(nextVert)
+            if newDist < nextVert.getDistance():
+                nextVert.setDistance( newDist )
+                nextVert.setPred(currentVert)
+                pq.decreaseKey(nextVert,newDist)
+
+
+def prim(G,start,queue=PriorityQueue):
+    pq = queue()
+    for v in G:
+        v.setDistance(sys.maxsize)
+        v.setPred(None)
+    start.setDistance(0)
+    pq.buildHeap([(v.getDistance(),v) for v in G])
+    while not pq.isEmpty():
+        currentVert = pq.delMin()
+        for nextVert in currentVert.getConnections():
+            newCost = currentVert.getWeight(nextVert)
+            if nextVert in pq and newCost < nextVert.getDistance():
+                nextVert.setPred(currentVert)
+                nextVert.setDistance(newCost)
+                pq.decreaseKey(nextVert,newCost)
+
+
+def queueBenchmark(sizes=(10**3, 10**4, 10**5), scanLimit=10**4):
+    """Dijkstra and Prim with the indexed PriorityQueue versus the scanning one.
+
+    The scanning queue is quadratic in the number of vertices, so it is only
+    run up to scanLimit vertices.
+    """
+    print('%-22s %8s %12s %10s' % ('queue', 'n', 'dijkstra s', 'prim s'))
+    for n in sizes:
+        g = randomGraph(n)
+        start = g.getVertex(0)
+        for queue in (ScanningPriorityQueue, PriorityQueue):
+            if queue is ScanningPriorityQueue and n > scanLimit:
+                continue
+            reset(g)
+            dijkstraTime = timeIt(lambda: dijkstra(g, start, queue))
+            distances = [v.getDistance() for v in g]
+            primTime = timeIt(lambda: prim(g, start, queue))
+            print('%-22s %8d %12.3f %10.3f' % (queue.__name__, n, dijkstraTime, primTime))
+        assert max(distances) < sys.maxsize
+
+
+def bfs(g,start):
+    # plain Graph bfs, with a deque so only the graph layout is compared
+    for v in g:
+        v.setDistance(sys.maxsize)
+        v.setPred(None)
+    start.setDistance(0)
+    queue = deque([start])
+    while queue:
+        currentVert = queue.popleft()
+        for nbr in currentVert.getConnections():
+            if nbr.getDistance() == sys.maxsize:
+                nbr.setDistance(currentVert.getDistance() + 1)
+                nbr.setPred(currentVert)
+                queue.append(nbr)
+
+
+def memoryUsed(build):
+    """Bytes still allocated after build() returns, and the object it built."""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return after - before, result
+
+
+def csrBenchmark(edges=10**6, degree=4):
+    """Memory, BFS, Dijkstra and Prim time of Graph versus the CSRGraph frozen from it.
+
+    randomGraph adds 2 * degree directed edges per vertex, so the graph has
+    about `edges` of them (a repeated random edge is only stored once).
+    The CSRGraph memory includes its key to id dict.
+    """
+    n = edges // (2 * degree)
+    graphBytes, g = memoryUsed(lambda: randomGraph(n, degree))
+    csrBytes, csr = memoryUsed(lambda: CSRGraph.fromGraph(g))
+    print('%d vertices, %d edges' % (n, csr.numEdges()))
+    print('%-10s %12s %8s %12s %8s' % ('graph', 'bytes/edge', 'bfs s', 'dijkstra s', 'prim s'))
+    start = g.getVertex(0)
+    bfsTime = timeIt(lambda: bfs(g, start))
+    reset(g)
+    dijkstraTime = timeIt(lambda: dijkstra(g, start))
+    primTime = timeIt(lambda: prim(g, start))
+    print('%-10s %12.1f %8.3f %12.3f %8.3f' % ('Graph', graphBytes / csr.numEdges(), bfsTime, dijkstraTime, primTime))
+    bfsTime = timeIt(lambda: csr.bfs(0))
+    dijkstraTime = timeIt(lambda: csr.dijkstra(0))
+    primTime = timeIt(lambda: csr.prim(0))
+    print('%-10s %12.1f %8.3f %12.3f %8.3f' % ('CSRGraph', csrBytes / csr.numEdges(), bfsTime, dijkstraTime, primTime))
+
+
+def manySourcesBenchmark(n=20000, sources=64, workers=4):
+    """Shortest paths from many sources: one after another, on a thread pool and on a process pool."""
+    g = randomGraph(n)
+    roots = list(range(sources))
+    print('%d vertices, %d sources, %d workers' % (n, sources, workers))
+    sequential = timeIt(lambda: [traversal.dijkstra(g, s) for s in roots])
+    threads = timeIt(lambda: traversal.searchMany(g, traversal.dijkstra, roots, workers))
+    processes = timeIt(lambda: traversal.searchMany(g, traversal.dijkstra, roots, workers, processes=True))
+    print('%-12s %8.3f' % ('sequential s', sequential))
+    print('%-12s %8.3f' % ('threads s', threads))
+    print('%-12s %8.3f' % ('processes s', processes))
+
+
+if __name__ == '__main__':
+    queueBenchmark()
+    csrBenchmark()
+    manySourcesBenchmark()
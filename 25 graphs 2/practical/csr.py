@@ -0,0 +1,231 @@
+from array import array
+from heapq import heappush, heappop
+
+INF = float('inf')
+
+
+class CSRGraph:
+    """A frozen graph stored in compressed sparse row form.
+
+    Vertices are numbered 0..n-1, keys[i] is the key of vertex i and ids maps
+    a key back to its number. The edges leaving vertex i are
+    neighbors[offsets[i]:offsets[i+1]] with the matching weights, so a
+    vertex costs one offset and an edge one int and one float, and a
+    traversal walks flat arrays instead of Vertex objects and dicts.
+
+    Searches keep their state in lists indexed by vertex id and return it,
+    so the graph itself never changes and needs no reset between runs.
+    """
+
+    def __init__(self,keys,offsets,neighbors,weights):
+        self.keys = keys
+        self.ids = {key: i for i, key in enumerate(keys)}
+        self.offsets = offsets
+        self.neighbors = neighbors
+        self.weights = weights
+
+    @classmethod
+    def fromGraph(cls,g):
+        """Freeze a Graph, vertex ids follow the order the vertices were added."""
+        keys = g.getVertices()
+        ids = {key: i for i, key in enumerate(keys)}
+        offsets = array('q',[0])
+        neighbors = array('q')
+        weights = array('d')
+        for key in keys:
+            for nbr, cost in g.getVertex(key).connectedTo.items():
+                neighbors.append(ids[nbr.getId()])
+                weights.append(cost)
+            offsets.append(len(neighbors))
+        return cls(keys,offsets,neighbors,weights)
+
+    @classmethod
+    def fromEdges(cls,edges,directed=True):
+        """Build from (from, to) or (from, to, cost) tuples, cost defaults to 0 like addEdge.
+
+        With directed False every edge is added in both directions.
+        """
+        ids = {}
+        keys = []
+        sources = array('q')
+        targets = array('q')
+        costs = array('d')
+        for edge in edges:
+            ends = []
+            for key in edge[:2]:
+                if key not in ids:
+                    ids[key] = len(keys)
+                    keys.append(key)
+                ends.append(ids[key])
+            cost = edge[2] if len(edge) > 2 else 0
+            sources.append(ends[0])
+            targets.append(ends[1])
+            costs.append(cost)
+            if not directed:
+                sources.append(ends[1])
+                targets.append(ends[0])
+                costs.append(cost)
+        # counting sort of the edges by source vertex
+        n = len(keys)
+        offsets = array('q',[0]) * (n + 1)
+        for s in sources:
+            offsets[s + 1] += 1
+        for i in range(n):
+            offsets[i + 1] += offsets[i]
+        fill = array('q',offsets[:n])
+        neighbors = array('q',[0]) * len(targets)
+        weights = array('d',[0.0]) * len(targets)
+        for s, t, c in zip(sources,targets,costs):
+            neighbors[fill[s]] = t
+            weights[fill[s]] = c
+            fill[s] += 1
+        return cls(keys,offsets,neighbors,weights)
+
+    def numVertices(self):
+        return len(self.keys)
+
+    def numEdges(self):
+        return len(self.neighbors)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __contains__(self,key):
+        return key in self.ids
+
+    def getConnections(self,key):
+        """(neighbor key, weight) pairs of the edges leaving key."""
+        i = self.ids[key]
+        lo, hi = self.offsets[i], self.offsets[i+1]
+        return [(self.keys[j], w) for j, w in zip(self.neighbors[lo:hi],self.weights[lo:hi])]
+
+    def path(self,pred,end):
+        """Keys from the search start to end, following a pred list returned by a search."""
+        i = self.ids[end]
+        out = []
+        while i != -1:
+            out.append(self.keys[i])
+            i = pred[i]
+        out.reverse()
+        return out
+
+    def bfs(self,start):
+        """Hop counts and predecessors from start, -1 where a vertex is unreachable."""
+        n = len(self.keys)
+        offsets = self.offsets
+        neighbors = self.neighbors
+        dist = [-1] * n
+        pred = [-1] * n
+        s = self.ids[start]
+        dist[s] = 0
+        frontier = [s]
+        level = 0
+        while frontier:
+            level += 1
+            nextFrontier = []
+            for v in frontier:
+                for w in neighbors[offsets[v]:offsets[v+1]]:
+                    if dist[w] == -1:
+                        dist[w] = level
+                        pred[w] = v
+                        nextFrontier.append(w)
+            frontier = nextFrontier
+        return dist, pred
+
+    def dfs(self,start=None):
+        """Discovery times, finish times and predecessors like DFSGraph.dfs.
+
+        Without start every vertex is used as a root in id order; disc and
+        fin are 0 for vertices the search never reached.
+        """
+        n = len(self.keys)
+        offsets = self.offsets
+        neighbors = self.neighbors
+        disc = [0] * n
+        fin = [0] * n
+        pred = [-1] * n
+        time = 0
+        roots = range(n) if start == None else [self.ids[start]]
+        for root in roots:
+            if disc[root]:
+                continue
+            time += 1
+            disc[root] = time
+            # each frame is a vertex and the index of its next edge to try
+            stack = [[root,offsets[root]]]
+            while stack:
+                frame = stack[-1]
+                v, e = frame
+                if e < offsets[v+1]:
+                    frame[1] = e + 1
+                    w = neighbors[e]
+                    if not disc[w]:
+                        pred[w] = v
+                        time += 1
+                        disc[w] = time
+                        stack.append([w,offsets[w]])
+                else:
+                    stack.pop()
+                    time += 1
+                    fin[v] = time
+        return disc, fin, pred
+
+    def dijkstra(self,start):
+        """Shortest path distances (inf when unreachable) and predecessors from start.
+
+        Uses a heap with lazy deletion: a vertex is pushed again when its
+        distance drops and stale entries are skipped when popped.
+        """
+        n = len(self.keys)
+        offsets = self.offsets
+        neighbors = self.neighbors
+        weights = self.weights
+        dist = [INF] * n
+        pred = [-1] * n
+        done = [False] * n
+        s = self.ids[start]
+        dist[s] = 0
+        heap = [(0,s)]
+        while heap:
+            d, v = heappop(heap)
+            if done[v]:
+                continue
+            done[v] = True
+            for e in range(offsets[v],offsets[v+1]):
+                w = neighbors[e]
+                nd = d + weights[e]
+                if nd < dist[w]:
+                    dist[w] = nd
+                    pred[w] = v
+                    heappush(heap,(nd,w))
+        return dist, pred
+
+    def prim(self,start):
+        """Minimum spanning tree of the part reachable from start.
+
+        Returns the cost of the edge connecting each vertex to the tree (inf
+        when unreachable) and its tree parent. Expects every edge to be
+        stored in both directions.
+        """
+        n = len(self.keys)
+        offsets = self.offsets
+        neighbors = self.neighbors
+        weights = self.weights
+        cost = [INF] * n
+        pred = [-1] * n
+        inTree = [False] * n
+        s = self.ids[start]
+        cost[s] = 0
+        heap = [(0,s)]
+        while heap:
+            c, v = heappop(heap)
+            if inTree[v]:
+                continue
+            inTree[v] = True
+            for e in range(offsets[v],offsets[v+1]):
+                w = neighbors[e]
+                if not inTree[w] and weights[e] < cost[w]:
+                    cost[w] = weights[e]
+                    pred[w] = v
+                    heappush(heap,(weights[e],w))
+        return cost, pred
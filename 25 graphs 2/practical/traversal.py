@@ -0,0 +1,161 @@
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from heapq import heappush, heappop
+from itertools import count
+
+from utils import Graph
+
+
+class SearchResult:
+    """What one search found, keyed by vertex key.
+
+    dist and pred are filled by bfs and dijkstra, disc, fin and pred by dfs.
+    Vertices the search never reached are missing from the dicts.
+    """
+
+    def __init__(self,source,dist=None,pred=None,disc=None,fin=None):
+        self.source = source
+        self.dist = dist if dist != None else {}
+        self.pred = pred if pred != None else {}
+        self.disc = disc if disc != None else {}
+        self.fin = fin if fin != None else {}
+
+    def reached(self,key):
+        return key in self.pred
+
+    def path(self,end):
+        """Keys from the source to end, [] when end was not reached."""
+        if end not in self.pred:
+            return []
+        out = []
+        while end != None:
+            out.append(end)
+            end = self.pred[end]
+        out.reverse()
+        return out
+
+
+# The searches below only read the graph: their state lives in the result,
+# so any number of them can run on one Graph at the same time and the
+# Vertex color/dist/pred fields are left alone.
+
+def bfs(g,start):
+    """Hop counts and predecessors from the vertex with key start."""
+    dist = {start: 0}
+    pred = {start: None}
+    frontier = [g.getVertex(start)]
+    level = 0
+    while frontier:
+        level += 1
+        nextFrontier = []
+        for v in frontier:
+            for nbr in v.connectedTo:
+                key = nbr.id
+                if key not in dist:
+                    dist[key] = level
+                    pred[key] = v.id
+                    nextFrontier.append(nbr)
+        frontier = nextFrontier
+    return SearchResult(start,dist=dist,pred=pred)
+
+
+def dfs(g,start=None):
+    """Discovery and finish times like DFSGraph.dfs, from start or from every vertex in turn."""
+    disc = {}
+    fin = {}
+    pred = {}
+    time = 0
+    roots = g if start == None else [g.getVertex(start)]
+    for root in roots:
+        if root.id in disc:
+            continue
+        time += 1
+        disc[root.id] = time
+        pred[root.id] = None
+        # each frame is a vertex and an iterator over its remaining neighbours
+        stack = [(root,iter(root.connectedTo))]
+        while stack:
+            v, nbrs = stack[-1]
+            for nbr in nbrs:
+                if nbr.id not in disc:
+                    time += 1
+                    disc[nbr.id] = time
+                    pred[nbr.id] = v.id
+                    stack.append((nbr,iter(nbr.connectedTo)))
+                    break
+            else:
+                stack.pop()
+                time += 1
+                fin[v.id] = time
+    return SearchResult(start,pred=pred,disc=disc,fin=fin)
+
+
+def dijkstra(g,start):
+    """Shortest path distances and predecessors from start, using the edge costs."""
+    dist = {start: 0}
+    pred = {start: None}
+    done = set()
+    # the counter breaks ties so vertices never get compared
+    tie = count()
+    heap = [(0,next(tie),g.getVertex(start))]
+    while heap:
+        d, t, v = heappop(heap)
+        if v.id in done:
+            continue
+        done.add(v.id)
+        for nbr, cost in v.connectedTo.items():
+            nd = d + cost
+            key = nbr.id
+            if key not in dist or nd < dist[key]:
+                dist[key] = nd
+                pred[key] = v.id
+                heappush(heap,(nd,next(tie),nbr))
+    return SearchResult(start,dist=dist,pred=pred)
+
+
+def edgeList(g):
+    """The vertex keys and (from, to, cost) edges of g, enough to rebuild it elsewhere."""
+    keys = g.getVertices()
+    edges = [(v.id, nbr.id, cost) for v in g for nbr, cost in v.connectedTo.items()]
+    return keys, edges
+
+
+def fromEdgeList(keys,edges):
+    g = Graph()
+    for key in keys:
+        g.addVertex(key)
+    for f, t, cost in edges:
+        g.addEdge(f,t,cost)
+    return g
+
+
+# the graph each worker process searches, set once by initWorker
+sharedGraph = None
+
+
+def initWorker(keys,edges):
+    global sharedGraph
+    sharedGraph = fromEdgeList(keys,edges)
+
+
+def searchShared(search,source):
+    return search(sharedGraph,source)
+
+
+def searchMany(g,search,sources,workers=4,processes=False):
+    """Run search(g, source) for every source in parallel, {source: SearchResult}.
+
+    Threads share g directly. Pure Python searches mostly hold the GIL,
+    so for CPU-bound batches set processes: every worker process then
+    rebuilds g once from its edge list and serves all its searches from that
+    copy. With processes, search must be a module level function such as
+    bfs, dfs or dijkstra so that it can be pickled.
+    """
+    sources = list(sources)
+    if processes:
+        keys, edges = edgeList(g)
+        with ProcessPoolExecutor(workers,initializer=initWorker,initargs=(keys,edges)) as pool:
+            results = pool.map(searchShared,[search] * len(sources),sources,
+                               chunksize=max(1,len(sources) // (4 * workers)))
+            return dict(zip(sources,results))
+    with ThreadPoolExecutor(workers) as pool:
+        return dict(zip(sources,pool.map(lambda source: search(g,source),sources)))
@@ -8,6 +8,7 @@
 import sys
 import os
 import unittest
+from collections import deque
 
 class Graph:
     def __init__(self):
@@ -41,6 +42,37 @@ class Graph:
         
     def __iter__(self):
         return iter(self.vertices.values())
+
+    def bfs(self,start):
+        """Level-synchronous breadth first search from start (a Vertex or a key).
+
+        Sets color, distance and predecessor of every vertex like the
+        practical's bfs, but works through the graph one whole frontier at a
+        time with plain lists instead of a queue. Returns the number of levels.
+        """
+        if not isinstance(start,Vertex):
+            start = self.vertices[start]
+        for v in self:
+            v.color = 'white'
+            v.dist = sys.maxsize
+            v.pred = None
+        start.color = 'gray'
+        start.dist = 0
+        frontier = [start]
+        level = 0
+        while frontier:
+            level = level + 1
+            nextFrontier = []
+            for currentVert in frontier:
+                for nbr in currentVert.connectedTo:
+                    if nbr.color == 'white':
+                        nbr.color = 'gray'
+                        nbr.dist = level
+                        nbr.pred = currentVert
+                        nextFrontier.append(nbr)
+                currentVert.color = 'black'
+            frontier = nextFrontier
+        return level
                 
 class Vertex:
     def __init__(self,num):
@@ -102,14 +134,15 @@ class Vertex:
 
 				
 class Queue:
+    # a deque makes both ends O(1), a list paid O(n) for every insert(0,item)
     def __init__(self):
-        self.items = []
+        self.items = deque()
 
     def isEmpty(self):
-        return self.items == []
+        return not self.items
     
     def enqueue(self, item):
-        self.items.insert(0,item)
+        self.items.appendleft(item)
 
     def dequeue(self):
         return self.items.pop()
@@ -119,28 +152,42 @@ class Queue:
 				
 
 class PriorityQueue:
+    """A binary min-heap of (priority, item) pairs.
+
+    position maps every item to its index in heapArray and is updated on each
+    swap, so decreaseKey and remove are O(log n) and `in` is O(1) instead of
+    scanning the heap. Items must be hashable and each can be queued once.
+    """
     def __init__(self):
         self.heapArray = [(0,0)]
         self.currentSize = 0
+        self.position = {}
 
     def buildHeap(self,alist):
         self.currentSize = len(alist)
         self.heapArray = [(0,0)]
+        self.position = {}
         for i in alist:
             self.heapArray.append(i)
+            self.position[i[1]] = len(self.heapArray) - 1
         i = len(alist) // 2            
         while (i > 0):
             self.percDown(i)
             i = i - 1
+
+    def swap(self,i,j):
+        self.heapArray[i], self.heapArray[j] = self.heapArray[j], self.heapArray[i]
+        self.position[self.heapArray[i][1]] = i
+        self.position[self.heapArray[j][1]] = j
                         
     def percDown(self,i):
         while (i * 2) <= self.currentSize:
             mc = self.minChild(i)
             if self.heapArray[i][0] > self.heapArray[mc][0]:
-                tmp = self.heapArray[i]
-                self.heapArray[i] = self.heapArray[mc]
-                self.heapArray[mc] = tmp
-            i = mc
+                self.swap(i,mc)
+                i = mc
+            else:
+                break
                 
     def minChild(self,i):
         if i*2 > self.currentSize:
@@ -157,23 +204,51 @@ class PriorityQueue:
     def percUp(self,i):
         while i // 2 > 0:
             if self.heapArray[i][0] < self.heapArray[i//2][0]:
-               tmp = self.heapArray[i//2]
-               self.heapArray[i//2] = self.heapArray[i]
-               self.heapArray[i] = tmp
-            i = i//2
+                self.swap(i,i//2)
+                i = i//2
+            else:
+                break
  
     def add(self,k):
+        # queuing an item that is already in the queue changes its priority
+        if k[1] in self.position:
+            self.changeKey(k[1],k[0])
+            return
         self.heapArray.append(k)
         self.currentSize = self.currentSize + 1
+        self.position[k[1]] = self.currentSize
         self.percUp(self.currentSize)
 
     def delMin(self):
         retval = self.heapArray[1][1]
-        self.heapArray[1] = self.heapArray[self.currentSize]
-        self.currentSize = self.currentSize - 1
-        self.heapArray.pop()
-        self.percDown(1)
+        self.removeAt(1)
         return retval
+
+    def removeAt(self,i):
+        # move the last pair into slot i and let it sift up or down from there
+        del self.position[self.heapArray[i][1]]
+        last = self.heapArray.pop()
+        self.currentSize = self.currentSize - 1
+        if i <= self.currentSize:
+            self.heapArray[i] = last
+            self.position[last[1]] = i
+            self.percUp(i)
+            self.percDown(self.position[last[1]])
+
+    def remove(self,item):
+        """Take item out of the queue and return its priority."""
+        if item not in self.position:
+            raise KeyError(item)
+        i = self.position[item]
+        priority = self.heapArray[i][0]
+        self.removeAt(i)
+        return priority
+
+    def peek(self):
+        """The item with the smallest priority, left in the queue."""
+        if self.currentSize == 0:
+            raise IndexError('peek from an empty queue')
+        return self.heapArray[1][1]
         
     def isEmpty(self):
         if self.currentSize == 0:
@@ -181,24 +256,23 @@ class PriorityQueue:
         else:
             return False
 
+    def __len__(self):
+        return self.currentSize
+
     def decreaseKey(self,val,amt):
         #this method is used when the distance to a vertex that is already in the queue is reduced, and thus moves that vertex toward the front of the queue.
-        done = False
-        i = 1
-        myKey = 0
-        while not done and i <= self.currentSize:
-            if self.heapArray[i][1] == val:
-                done = True
-                myKey = i
-            else:
-                i = i + 1
-        if myKey > 0:
-            self.heapArray[myKey] = (amt,self.heapArray[myKey][1])
-            self.percUp(myKey)
+        if val in self.position:
+            self.changeKey(val,amt)
+
+    def changeKey(self,val,amt):
+        i = self.position[val]
+        old = self.heapArray[i][0]
+        self.heapArray[i] = (amt,val)
+        if amt < old:
+            self.percUp(i)
+        else:
+            self.percDown(i)
             
     def __contains__(self,vtx):
-        for pair in self.heapArray:
-            if pair[1] == vtx:
-                return True
-        return False
+        return vtx in self.position
                            
\ No newline at end of file
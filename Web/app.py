@@ -1,55 +1,45 @@
-from flask import Flask, request, render_template
+from flask import Flask, Response, request, render_template, jsonify
 from mongoengine import *
-import os
-import csv
+from pymongo.errors import OperationFailure
+
+from cache import ResponseCache
+from jobs import IngestRunner
+from lookup import CountryLookup
+from models import Country
+from ingest import ingest, indicatorFiles, indicatorName
+from queries import storedRows, yearSlice, countrySeries, indicatorTables, streamCountries
+from stats import getStats, dropStats, POPULATION
+from store import openStore
+from writes import WriteBehindQueue, applyWrites, upsertWrite, deleteWrite
 
 app = Flask(__name__)
-connect('web3DB')
-
 app.config.from_object('config')
+connect(app.config['DB_NAME'], **app.config['MONGO_SETTINGS'])
+try:
+    Country.ensure_indexes()
+except OperationFailure as e:
+    #older databases can hold the same country twice, which the unique name index refuses
+    raise SystemExit('could not build the country indexes (%s), run "python ingest.py" once '
+                     'to merge duplicate countries' % e)
+
+#memory-mapped indicator matrices, None when disabled or numpy is not installed
+store = openStore(app.config['STORE_FOLDER']) if app.config['USE_COLUMN_STORE'] else None
+#rendered /countries responses, every write to the data must call cache.invalidate()
+cache = ResponseCache(app.config['RESPONSE_CACHE_ENTRIES'], app.config['RESPONSE_CACHE_BYTES'])
+#id / name / code / alias -> country name, reset on every write
+lookup = CountryLookup()
+#background ingest jobs started by /loadData
+ingestRunner = IngestRunner(workers=app.config['INGEST_WORKERS'], useProcesses=app.config['INGEST_PROCESSES'],
+                            history=app.config['INGEST_JOB_HISTORY'])
 
 
 
-#Country class
-class Country(Document):
-	name = StringField()
-	data = DictField()
-
 #Home route
 @app.route('/')
 @app.route('/index')
 @app.route('/home')
 def hello_world():
     pageName = "Information"
-
-    for file in os.listdir(app.config['FILES_FOLDER']):
-        filename = os.fsdecode(file)
-        path = os.path.join(app.config['FILES_FOLDER'],filename)
-        f = open(path)
-        r = csv.DictReader(f) 
-        d = list(r)
-        for data in d:
-            county = Country()
-            dict = {}
-            for key in data: 
-                if key == "country":
-                    # check if this country already exists in the db
-                    if Country.objects(name=data[key]).count() > 0:
-                        county = Country.objects(name=data[key])[0]
-                        dict = county.data
-                    else:
-                        county.name = data[key]
-                else:
-                    #saving data to the database from files
-                    f = filename.replace(".csv","")
-                    if f in dict: # check if this filename is already a field in the dict
-                        dict[f][key] = data[key] # if it is, just add a new subfield
-                    else:
-                        dict[f] = {key:data[key]} # if it is not, create a new object and assign it to the dict
-            county["data"] = dict
-            Country.save(county)
-            #saving country
-    
     return render_template("index.html", title=pageName), 200
 
 
@@ -57,34 +47,188 @@ def hello_world():
 @app.route('/inspiration')
 def inspiration():
     pageName = "Inspiration"
-    newcountry = Country(name="motivationLand")
-    newcountry.save()
+    Country.objects(name="motivationLand").update_one(set__name="motivationLand", upsert=True)
+    cache.invalidate()
+    lookup.reset()
     return render_template("inspiration.html", title=pageName)
 
 
+#start (re)loading the indicator files in the background, unchanged files are skipped unless ?force=1
 @app.route('/loadData')
 def loadData():
-    return "Success"
+    force = request.args.get('force') == '1'
+    job = ingestRunner.start(lambda job, executor: runIngest(job, executor, force))
+    return jsonify({'job': job.id, 'status': job.status()}), 202
+
+
+#progress of an ingest started by /loadData
+@app.route('/loadData/<job_id>')
+def loadDataStatus(job_id):
+    job = ingestRunner.get(job_id)
+    if job is None:
+        return jsonify({'error': 'no job ' + job_id}), 404
+    return jsonify(job.status()), 200
+
+
+def runIngest(job, executor, force):
+    result = ingest(app.config['FILES_FOLDER'], force=force, store=store, executor=executor, job=job)
+    if result['loaded']:
+        cache.invalidate()
+        lookup.reset()
+    return result
 
 
 @app.route('/countries', methods=['GET'])
 @app.route('/countries/<country_id>', methods=['GET'])
+@cache.cached
 def getCountries(country_id=None):
+    try:
+        year = intArg('year')
+        lo = intArg('from')
+        hi = intArg('to')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    indicators = request.args.get('indicators')
+    known = indicatorNames()
+    names = [name for name in indicators.split(',') if name] if indicators else known
+    unknown = [name for name in names if name not in known]
+    if unknown:
+        return jsonify({'error': 'unknown indicators: ' + ', '.join(unknown)}), 400
+    if indicators and not names:
+        return jsonify({'error': 'indicators must name at least one indicator'}), 400
+
+    if country_id is not None:
+        country = findCountry(country_id)
+        if country is None:
+            return jsonify({'error': 'no country ' + country_id}), 404
+        return jsonify(countrySeries(store, country, names, lo, hi)), 200
+    if year is not None:
+        return jsonify(yearSlice(store, year, names)), 200
+    stream = request.args.get('stream')
+    if stream in STREAM_TYPES:
+        rows = streamCountries(stream, indicators and names, app.config['STREAM_BATCH_SIZE'])
+        return Response(rows, mimetype=STREAM_TYPES[stream]), 200
+    if indicators:
+        return jsonify(indicatorTables(store, names)), 200
     Countries = Country.objects
     return Countries.to_json(), 200
 
 
-
+#precomputed summary of one indicator, for every year or just ?year=
+@app.route('/stats', methods=['GET'])
+@cache.cached
+def getIndicatorStats():
+    name = request.args.get('indicator')
+    if not name:
+        return jsonify({'error': 'indicator is required'}), 400
+    #checked against the files first, so a bad name never reaches mongo
+    if name not in indicatorNames():
+        return jsonify({'error': 'unknown indicator ' + name}), 404
+    try:
+        year = intArg('year')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    stats = getStats(name)
+    if stats is None:
+        return jsonify({'error': 'no data for ' + name}), 404
+    result = {'indicator': name, 'min': stats.min, 'max': stats.max}
+    if year is None:
+        result['years'] = stats.years
+    else:
+        result['year'] = year
+        result['summary'] = stats.years.get(str(year))
+    return jsonify(result), 200
+
+
+#?stream= modes of /countries and their content types
+STREAM_TYPES = {'ndjson': 'application/x-ndjson', 'json': 'application/json'}
+
+
+def intArg(name):
+    value = request.args.get(name)
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError('%s must be a whole number' % name)
+
+
+#indicator names are the csv file names in FILES_FOLDER
+def indicatorNames():
+    return [indicatorName(filename) for filename, path in indicatorFiles(app.config['FILES_FOLDER'])]
+
+
+#resolve a country by its document id, name, ISO code or alias
+def findCountry(country_id):
+    return lookup.resolve(country_id)
+
+
+#delete one country, or a json list of ids/names sent to /delete
+@app.route('/delete', methods=['DELETE'])
 @app.route('/delete/<country_id>', methods=['DELETE'])
-def deleteCountry(country_id):
-    #codeGOESHERE
-    return "Success"
+def deleteCountry(country_id=None):
+    items = [country_id] if country_id is not None else request.get_json(silent=True)
+    return queueWrites(items, deleteTarget)
 
 
+#add or update one country, or a json list of them:
+#{"name": "Albania", "data": {"fertility": {"2000": 2.16}}}
 @app.route('/newCountry', methods=['PUT'])
 def addCountry():
-    #CODECODEY
-    return "Success"
+    items = request.get_json(silent=True)
+    if isinstance(items, dict):
+        items = [items]
+    return queueWrites(items, upsertWrite)
+
+
+def deleteTarget(item):
+    write = deleteWrite(item)
+    name = lookup.resolve(item)
+    return write._replace(target=name) if name is not None else write
+
+
+#validate items, push them through the write-behind queue and report per item
+def queueWrites(items, makeWrite):
+    if not isinstance(items, list) or not items:
+        return jsonify({'error': 'expected a non-empty json list'}), 400
+    results = [None] * len(items)
+    writes = []
+    positions = []
+    for i, item in enumerate(items):
+        try:
+            writes.append(makeWrite(item))
+            positions.append(i)
+        except ValueError as e:
+            results[i] = {'status': 'error', 'error': str(e)}
+    for i, future in zip(positions, writeQueue.submit(writes)):
+        try:
+            results[i] = future.result(timeout=app.config['WRITE_TIMEOUT'])
+        except Exception as e:
+            results[i] = {'status': 'error', 'error': str(e)}
+    return jsonify({'results': results}), 200
+
+
+#applied by the write-behind thread, one bulk round-trip per batch
+def flushWrites(writes):
+    results = applyWrites(writes)
+    if any(r['status'] != 'error' for r in results):
+        lookup.reset()
+        changed = {key.split('.')[1] for w in writes if w.kind == 'upsert'
+                   for key in w.fields if key.startswith('data.')}
+        deleted = any(w.kind == 'delete' for w in writes)
+        #population weights every other summary
+        dropStats(None if deleted or POPULATION in changed else changed)
+        #rebuilt from mongo and swapped in whole, so readers see the old or the new matrix
+        if store is not None:
+            for name in [name for name in list(store.indicators) if deleted or name in changed]:
+                store.save(name, storedRows(name))
+        #last, so a response built from the old store or stats is never cached under the new version
+        cache.invalidate()
+    return results
+
+
+writeQueue = WriteBehindQueue(flushWrites, app.config['WRITE_BATCH_SIZE'], app.config['WRITE_FLUSH_SECONDS'])
 
 
 if __name__=="__main__":
@@ -0,0 +1,200 @@
+"""Benchmarks for the ingest and query paths of the web app.
+
+Generates synthetic indicator files, loads them and times the /countries,
+/stats and streaming endpoints through the flask test client. Results are
+printed (or written with --output) as json so runs can be compared.
+
+    python bench.py --countries 200 --years 220 --indicators 4
+    python bench.py --mongomock --countries 2000 --output results.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import config
+
+FIRST_YEAR = 1800
+
+
+def generateDataset(folder, countries, years, indicators, seed=0):
+    """Write indicators csv files of countries x years random values, like the gapminder files.
+
+    The first file is population_total so the population weighted statistics have weights.
+    """
+    rng = random.Random(seed)
+    os.makedirs(folder, exist_ok=True)
+    names = ['Country %05d' % i for i in range(countries)]
+    header = ['country'] + [str(FIRST_YEAR + y) for y in range(years)]
+    for i in range(indicators):
+        indicator = 'population_total' if i == 0 else 'indicator_%02d' % i
+        scale = 1e7 if i == 0 else 10 ** rng.randint(0, 3)
+        with open(os.path.join(folder, indicator + '.csv'), 'w') as f:
+            f.write(','.join(header) + '\n')
+            for name in names:
+                values = ['%.3g' % (rng.random() * scale) for y in range(years)]
+                f.write(name + ',' + ','.join(values) + '\n')
+    return names
+
+
+def timed(fn, repeat):
+    """Run fn repeat times and return (milliseconds per run, last result)."""
+    times = []
+    result = None
+    for i in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append((time.perf_counter() - start) * 1000)
+    return times, result
+
+
+def summary(times):
+    ordered = sorted(times)
+    return {
+        'runs': len(ordered),
+        'median_ms': statistics.median(ordered),
+        'p95_ms': ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        'min_ms': ordered[0],
+    }
+
+
+def peakMemory(fn):
+    """Peak bytes allocated by python while running fn once."""
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def benchIngest(webapp, folder, workers):
+    from ingest import ingest
+
+    def load(force, pool=ProcessPoolExecutor):
+        with pool(workers) as executor:
+            return ingest(folder, force=force, store=webapp.store, executor=executor)
+
+    start = time.perf_counter()
+    result = load(True)
+    full = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    load(False)
+    unchanged = (time.perf_counter() - start) * 1000
+    return {
+        'full_ms': full,
+        'unchanged_ms': unchanged,
+        'countries': result['countries'],
+        #tracemalloc only sees this process, so parse on threads to count the parsing too
+        'peak_bytes': peakMemory(lambda: load(True, ThreadPoolExecutor)),
+    }
+
+
+def benchQueries(webapp, names, indicators, years, repeat):
+    client = webapp.app.test_client()
+    indicatorList = ','.join(indicators[:3])
+    middle = names[len(names) // 2]
+    #a year and a range inside the generated columns, whatever --years is
+    year = FIRST_YEAR + years // 2
+    first = FIRST_YEAR + years // 4
+    last = FIRST_YEAR + (3 * years) // 4
+    urls = {
+        'countries_full': '/countries',
+        'countries_stream_ndjson': '/countries?stream=ndjson',
+        'countries_year': '/countries?year=%d&indicators=%s' % (year, indicatorList),
+        'countries_indicator': '/countries?indicators=' + indicators[-1],
+        'country_range': '/countries/%s?from=%d&to=%d' % (middle, first, last),
+        'stats_year': '/stats?indicator=%s&year=%d' % (indicators[-1], year),
+    }
+    results = {}
+    for key, url in urls.items():
+        def cold():
+            webapp.cache.invalidate()
+            return client.get(url)
+
+        coldTimes, response = timed(cold, repeat)
+        warmTimes, response = timed(lambda: client.get(url), repeat)
+        etag = response.headers.get('ETag')
+        notModified, response304 = timed(lambda: client.get(url, headers={'If-None-Match': etag} if etag else {}), repeat)
+        results[key] = {
+            'url': url,
+            'status': response.status_code,
+            'payload_bytes': len(response.get_data()),
+            'cold': summary(coldTimes),
+            'cached': summary(warmTimes),
+            'not_modified': summary(notModified),
+            'peak_bytes': peakMemory(cold),
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark ingest and query paths on synthetic data.')
+    parser.add_argument('--countries', type=int, default=200)
+    parser.add_argument('--years', type=int, default=220)
+    parser.add_argument('--indicators', type=int, default=4)
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--workers', type=int, default=config.INGEST_WORKERS)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--db', default='web3Bench', help='database to use, it is dropped afterwards')
+    parser.add_argument('--host', default='localhost', help='mongod to run against')
+    parser.add_argument('--mongomock', action='store_true', help='use an in-memory mongomock client instead of mongod')
+    parser.add_argument('--no-store', action='store_true', help='serve everything from mongo, without the column store')
+    parser.add_argument('--output', help='write the json results here instead of stdout')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='web3bench-')
+    folder = os.path.join(workdir, 'files')
+    names = generateDataset(folder, args.countries, args.years, args.indicators, args.seed)
+
+    #app reads its settings from the config module when it is imported
+    config.DB_NAME = args.db
+    config.FILES_FOLDER = folder
+    config.STORE_FOLDER = os.path.join(workdir, 'store')
+    config.USE_COLUMN_STORE = not args.no_store
+    if args.mongomock:
+        import mongomock
+        config.MONGO_SETTINGS = {'mongo_client_class': mongomock.MongoClient}
+    else:
+        config.MONGO_SETTINGS = {'host': args.host}
+
+    import app as webapp
+    from ingest import indicatorFiles, indicatorName
+    from mongoengine.connection import get_db
+
+    indicators = [indicatorName(filename) for filename, path in indicatorFiles(folder)]
+    try:
+        results = {
+            'dataset': {
+                'countries': args.countries,
+                'years': args.years,
+                'indicators': args.indicators,
+                'csv_bytes': sum(os.path.getsize(path) for filename, path in indicatorFiles(folder)),
+            },
+            'backend': 'mongomock' if args.mongomock else 'mongod',
+            'column_store': webapp.store is not None,
+            'python': platform.python_version(),
+            'ingest': benchIngest(webapp, folder, args.workers),
+            'queries': benchQueries(webapp, names, indicators, args.years, args.repeat),
+        }
+    finally:
+        get_db().client.drop_database(args.db)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    text = json.dumps(results, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
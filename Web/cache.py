@@ -0,0 +1,81 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import wraps
+
+from flask import request, make_response
+
+
+class ResponseCache:
+    """LRU cache of rendered GET responses keyed by path and query string.
+
+    Entries are bounded both by count and by total body size. Every write to
+    the data calls invalidate(), which bumps the version and drops everything.
+    """
+
+    def __init__(self, maxEntries=256, maxBytes=32 * 1024 * 1024):
+        self.maxEntries = maxEntries
+        self.maxBytes = maxBytes
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, entry, version):
+        body = entry[0]
+        if len(body) > self.maxBytes:
+            return
+        with self.lock:
+            #the data changed while this response was being built
+            if version != self.version:
+                return
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.bytes -= len(old[0])
+            self.entries[key] = entry
+            self.bytes += len(body)
+            while len(self.entries) > self.maxEntries or self.bytes > self.maxBytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.bytes -= len(evicted[0])
+
+    def invalidate(self):
+        with self.lock:
+            self.version += 1
+            self.entries.clear()
+            self.bytes = 0
+
+    def cached(self, view):
+        """Decorator serving a GET view from the cache, with ETag / If-None-Match support."""
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            key = (request.path, tuple(sorted(request.args.items(multi=True))))
+            entry = self.get(key)
+            if entry is None:
+                version = self.version
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200 or response.is_streamed:
+                    return response
+                body = response.get_data()
+                entry = (body, response.mimetype, '"%s"' % hashlib.sha1(body).hexdigest())
+                self.put(key, entry, version)
+            body, mimetype, etag = entry
+            if request.if_none_match.contains(etag.strip('"')):
+                response = make_response('', 304)
+            else:
+                response = make_response(body, 200)
+                response.mimetype = mimetype
+            response.headers['ETag'] = etag
+            return response
+        return wrapper
@@ -0,0 +1,95 @@
+#ISO 3166-1 alpha-3 code of every country name used in the indicator files
+CODES = {
+    'Afghanistan': 'AFG', 'Albania': 'ALB', 'Algeria': 'DZA', 'Andorra': 'AND',
+    'Angola': 'AGO', 'Antigua and Barbuda': 'ATG', 'Argentina': 'ARG', 'Armenia': 'ARM',
+    'Australia': 'AUS', 'Austria': 'AUT', 'Azerbaijan': 'AZE', 'Bahamas': 'BHS',
+    'Bahrain': 'BHR', 'Bangladesh': 'BGD', 'Barbados': 'BRB', 'Belarus': 'BLR',
+    'Belgium': 'BEL', 'Belize': 'BLZ', 'Benin': 'BEN', 'Bhutan': 'BTN',
+    'Bolivia': 'BOL', 'Bosnia and Herzegovina': 'BIH', 'Botswana': 'BWA', 'Brazil': 'BRA',
+    'Brunei': 'BRN', 'Bulgaria': 'BGR', 'Burkina Faso': 'BFA', 'Burundi': 'BDI',
+    'Cambodia': 'KHM', 'Cameroon': 'CMR', 'Canada': 'CAN', 'Cape Verde': 'CPV',
+    'Central African Republic': 'CAF', 'Chad': 'TCD', 'Chile': 'CHL', 'China': 'CHN',
+    'Colombia': 'COL', 'Comoros': 'COM', 'Congo, Dem. Rep.': 'COD', 'Congo, Rep.': 'COG',
+    'Costa Rica': 'CRI', "Cote d'Ivoire": 'CIV', 'Croatia': 'HRV', 'Cuba': 'CUB',
+    'Cyprus': 'CYP', 'Czech Republic': 'CZE', 'Denmark': 'DNK', 'Djibouti': 'DJI',
+    'Dominica': 'DMA', 'Dominican Republic': 'DOM', 'Ecuador': 'ECU', 'Egypt': 'EGY',
+    'El Salvador': 'SLV', 'Equatorial Guinea': 'GNQ', 'Eritrea': 'ERI', 'Estonia': 'EST',
+    'Ethiopia': 'ETH', 'Fiji': 'FJI', 'Finland': 'FIN', 'France': 'FRA',
+    'Gabon': 'GAB', 'Gambia': 'GMB', 'Georgia': 'GEO', 'Germany': 'DEU',
+    'Ghana': 'GHA', 'Greece': 'GRC', 'Grenada': 'GRD', 'Guatemala': 'GTM',
+    'Guinea': 'GIN', 'Guinea-Bissau': 'GNB', 'Guyana': 'GUY', 'Haiti': 'HTI',
+    'Holy See': 'VAT', 'Honduras': 'HND', 'Hungary': 'HUN', 'Iceland': 'ISL',
+    'India': 'IND', 'Indonesia': 'IDN', 'Iran': 'IRN', 'Iraq': 'IRQ',
+    'Ireland': 'IRL', 'Israel': 'ISR', 'Italy': 'ITA', 'Jamaica': 'JAM',
+    'Japan': 'JPN', 'Jordan': 'JOR', 'Kazakhstan': 'KAZ', 'Kenya': 'KEN',
+    'Kiribati': 'KIR', 'Kuwait': 'KWT', 'Kyrgyz Republic': 'KGZ', 'Lao': 'LAO',
+    'Latvia': 'LVA', 'Lebanon': 'LBN', 'Lesotho': 'LSO', 'Liberia': 'LBR',
+    'Libya': 'LBY', 'Liechtenstein': 'LIE', 'Lithuania': 'LTU', 'Luxembourg': 'LUX',
+    'Macedonia, FYR': 'MKD', 'Madagascar': 'MDG', 'Malawi': 'MWI', 'Malaysia': 'MYS',
+    'Maldives': 'MDV', 'Mali': 'MLI', 'Malta': 'MLT', 'Marshall Islands': 'MHL',
+    'Mauritania': 'MRT', 'Mauritius': 'MUS', 'Mexico': 'MEX', 'Micronesia, Fed. Sts.': 'FSM',
+    'Moldova': 'MDA', 'Monaco': 'MCO', 'Mongolia': 'MNG', 'Montenegro': 'MNE',
+    'Morocco': 'MAR', 'Mozambique': 'MOZ', 'Myanmar': 'MMR', 'Namibia': 'NAM',
+    'Nauru': 'NRU', 'Nepal': 'NPL', 'Netherlands': 'NLD', 'New Zealand': 'NZL',
+    'Nicaragua': 'NIC', 'Niger': 'NER', 'Nigeria': 'NGA', 'North Korea': 'PRK',
+    'Norway': 'NOR', 'Oman': 'OMN', 'Pakistan': 'PAK', 'Palau': 'PLW',
+    'Palestine': 'PSE', 'Panama': 'PAN', 'Papua New Guinea': 'PNG', 'Paraguay': 'PRY',
+    'Peru': 'PER', 'Philippines': 'PHL', 'Poland': 'POL', 'Portugal': 'PRT',
+    'Qatar': 'QAT', 'Romania': 'ROU', 'Russia': 'RUS', 'Rwanda': 'RWA',
+    'Samoa': 'WSM', 'San Marino': 'SMR', 'Sao Tome and Principe': 'STP', 'Saudi Arabia': 'SAU',
+    'Senegal': 'SEN', 'Serbia': 'SRB', 'Seychelles': 'SYC', 'Sierra Leone': 'SLE',
+    'Singapore': 'SGP', 'Slovak Republic': 'SVK', 'Slovenia': 'SVN', 'Solomon Islands': 'SLB',
+    'Somalia': 'SOM', 'South Africa': 'ZAF', 'South Korea': 'KOR', 'South Sudan': 'SSD',
+    'Spain': 'ESP', 'Sri Lanka': 'LKA', 'St. Kitts and Nevis': 'KNA', 'St. Lucia': 'LCA',
+    'St. Vincent and the Grenadines': 'VCT', 'Sudan': 'SDN', 'Suriname': 'SUR', 'Swaziland': 'SWZ',
+    'Sweden': 'SWE', 'Switzerland': 'CHE', 'Syria': 'SYR', 'Tajikistan': 'TJK',
+    'Tanzania': 'TZA', 'Thailand': 'THA', 'Timor-Leste': 'TLS', 'Togo': 'TGO',
+    'Tonga': 'TON', 'Trinidad and Tobago': 'TTO', 'Tunisia': 'TUN', 'Turkey': 'TUR',
+    'Turkmenistan': 'TKM', 'Tuvalu': 'TUV', 'Uganda': 'UGA', 'Ukraine': 'UKR',
+    'United Arab Emirates': 'ARE', 'United Kingdom': 'GBR', 'United States': 'USA', 'Uruguay': 'URY',
+    'Uzbekistan': 'UZB', 'Vanuatu': 'VUT', 'Venezuela': 'VEN', 'Vietnam': 'VNM',
+    'Yemen': 'YEM', 'Zambia': 'ZMB', 'Zimbabwe': 'ZWE',
+}
+
+#other spellings found in indicator sources, mapped to the names above
+ALIASES = {
+    'Bahamas, The': 'Bahamas',
+    'Brunei Darussalam': 'Brunei',
+    'Burma': 'Myanmar',
+    'Cabo Verde': 'Cape Verde',
+    'Czechia': 'Czech Republic',
+    'Democratic Republic of the Congo': 'Congo, Dem. Rep.',
+    'East Timor': 'Timor-Leste',
+    'Egypt, Arab Rep.': 'Egypt',
+    'Eswatini': 'Swaziland',
+    'Gambia, The': 'Gambia',
+    'Iran, Islamic Rep.': 'Iran',
+    'Ivory Coast': "Cote d'Ivoire",
+    'Korea, Dem. Rep.': 'North Korea',
+    'Korea, Rep.': 'South Korea',
+    'Kyrgyzstan': 'Kyrgyz Republic',
+    'Lao PDR': 'Lao',
+    'Laos': 'Lao',
+    'Macedonia': 'Macedonia, FYR',
+    'Micronesia': 'Micronesia, Fed. Sts.',
+    'North Macedonia': 'Macedonia, FYR',
+    'Republic of the Congo': 'Congo, Rep.',
+    'Russian Federation': 'Russia',
+    'Slovakia': 'Slovak Republic',
+    'Saint Kitts and Nevis': 'St. Kitts and Nevis',
+    'Saint Lucia': 'St. Lucia',
+    'Saint Vincent and the Grenadines': 'St. Vincent and the Grenadines',
+    'Syrian Arab Republic': 'Syria',
+    'Turkiye': 'Turkey',
+    'UK': 'United Kingdom',
+    'USA': 'United States',
+    'United States of America': 'United States',
+    'Vatican': 'Holy See',
+    'Venezuela, RB': 'Venezuela',
+    'Viet Nam': 'Vietnam',
+    'Yemen, Rep.': 'Yemen',
+}
+
+
+def canonicalName(name):
+    return ALIASES.get(name, name)
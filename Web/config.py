@@ -2,4 +2,28 @@ import os
 
 basedir = os.path.abspath(os.path.dirname(__file__))
 FILES_FOLDER = os.path.join(basedir, 'files')
-static_FOLDER = os.path.join(basedir, 'static')
\ No newline at end of file
+static_FOLDER = os.path.join(basedir, 'static')
+DB_NAME = 'web3DB'
+#extra keyword arguments for mongoengine.connect, e.g. host or mongo_client_class
+MONGO_SETTINGS = {}
+#number of country upserts sent to mongo in a single bulk write
+INGEST_BATCH_SIZE = 500
+#keep a memory-mapped float64 copy of each indicator next to mongo (needs numpy)
+USE_COLUMN_STORE = True
+STORE_FOLDER = os.path.join(basedir, 'store')
+#bounds for the in-memory cache of /countries responses
+RESPONSE_CACHE_ENTRIES = 256
+RESPONSE_CACHE_BYTES = 32 * 1024 * 1024
+#documents fetched per mongo round-trip when streaming /countries?stream=ndjson|json
+STREAM_BATCH_SIZE = 50
+#the write-behind queue flushes when this many writes wait or the oldest has waited this long
+WRITE_BATCH_SIZE = 500
+WRITE_FLUSH_SECONDS = 0.05
+#seconds a request waits for its writes to be applied
+WRITE_TIMEOUT = 30
+#ingest jobs parse files in parallel on this many workers, threads unless INGEST_PROCESSES is on
+#(worth it for large files, small ones parse faster than processes start)
+INGEST_WORKERS = 4
+INGEST_PROCESSES = False
+#finished ingest jobs kept for /loadData/<job_id>
+INGEST_JOB_HISTORY = 20
@@ -0,0 +1,180 @@
+import argparse
+import csv
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from mongoengine import connect
+from pymongo import UpdateOne
+
+import config
+from codes import CODES, canonicalName
+from models import Country, IngestedFile
+from queries import storedRows
+from stats import refreshStats
+from store import openStore
+
+
+def fileDigest(path):
+    sha = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(65536), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def indicatorName(filename):
+    return os.path.splitext(filename)[0]
+
+
+def indicatorFiles(folder):
+    for filename in sorted(os.listdir(folder)):
+        if filename.endswith('.csv'):
+            yield filename, os.path.join(folder, filename)
+
+
+def parseFile(path):
+    """Read one indicator file into {country: {year: value}}, dropping empty cells.
+
+    Country names are mapped through the alias table so spellings agree across files.
+    """
+    rows = {}
+    with open(path, newline='') as f:
+        reader = csv.reader(f)
+        years = next(reader)[1:]
+        for row in reader:
+            if not row:
+                continue
+            rows[canonicalName(row[0])] = {year: value for year, value in zip(years, row[1:]) if value != ''}
+    return rows
+
+
+def mergeIndicators(indicators):
+    """Fold {indicator: {country: values}} into one $set document per country."""
+    merged = {}
+    for indicator, rows in indicators.items():
+        for name, values in rows.items():
+            merged.setdefault(name, {})['data.' + indicator] = values
+    for name, fields in merged.items():
+        if name in CODES:
+            fields['code'] = CODES[name]
+    return merged
+
+
+def writeCountries(merged, batchSize=config.INGEST_BATCH_SIZE, job=None):
+    collection = Country._get_collection()
+    ops = [UpdateOne({'name': name}, {'$set': fields}, upsert=True)
+           for name, fields in merged.items()]
+    upserted = 0
+    for start in range(0, len(ops), batchSize):
+        result = collection.bulk_write(ops[start:start + batchSize], ordered=False)
+        upserted += result.upserted_count + result.modified_count
+        if job is not None:
+            job.upserted(result.upserted_count + result.modified_count)
+    return upserted
+
+
+def dedupeCountries():
+    """Merge countries stored more than once under the same name, so the unique name index can be built.
+
+    The oldest document is kept and takes any data or code it lacks from the
+    others, which are then deleted. Returns the number of documents removed.
+    """
+    collection = Country._get_collection()
+    groups = collection.aggregate([
+        {'$group': {'_id': '$name', 'ids': {'$push': '$_id'}, 'count': {'$sum': 1}}},
+        {'$match': {'count': {'$gt': 1}}},
+    ])
+    removed = 0
+    for group in groups:
+        docs = list(collection.find({'_id': {'$in': group['ids']}}).sort('_id', 1))
+        keep, extras = docs[0], docs[1:]
+        data = keep.get('data') or {}
+        code = keep.get('code')
+        for doc in extras:
+            for indicator, values in (doc.get('data') or {}).items():
+                merged = dict(values)
+                merged.update(data.get(indicator, {}))
+                data[indicator] = merged
+            code = code or doc.get('code')
+        collection.delete_many({'_id': {'$in': [doc['_id'] for doc in extras]}})
+        fields = {'data': data}
+        if code:
+            fields['code'] = code
+        collection.update_one({'_id': keep['_id']}, {'$set': fields})
+        removed += len(extras)
+    return removed
+
+
+def ingest(folder=config.FILES_FOLDER, force=False, store=None, executor=None, job=None):
+    """Load every changed indicator file in folder with bulk upserts.
+
+    Files whose content hash matches the last successful run are skipped
+    unless force is set. When a column store is given, every loaded
+    indicator and every indicator missing from the store is rebuilt in it
+    from mongo, so edits made through the api are kept. Files are parsed
+    on executor when one is given, and progress is reported to job.
+    Returns a summary of what was done.
+    """
+    known = {f.name: f.digest for f in IngestedFile.objects}
+    digests = {}
+    skipped = []
+    toParse = []
+    for filename, path in indicatorFiles(folder):
+        digest = fileDigest(path)
+        name = indicatorName(filename)
+        if not force and known.get(filename) == digest:
+            skipped.append(filename)
+            #mongo may hold edits made through the api, so rebuild from there
+            if store is not None and name not in store:
+                store.save(name, storedRows(name))
+            continue
+        toParse.append((name, path))
+        digests[filename] = digest
+
+    paths = [path for name, path in toParse]
+    parsed = executor.map(parseFile, paths) if executor is not None else map(parseFile, paths)
+    indicators = {}
+    for (name, path), rows in zip(toParse, parsed):
+        indicators[name] = rows
+        if job is not None:
+            job.parsed(len(rows))
+
+    merged = mergeIndicators(indicators)
+    upserted = writeCountries(merged, job=job) if merged else 0
+
+    #countries added through the api are only in mongo, so rebuild from there
+    if store is not None:
+        for name in indicators:
+            store.save(name, storedRows(name))
+
+    #only remember the hashes once the data is safely written
+    for filename, digest in digests.items():
+        IngestedFile.objects(name=filename).update_one(set__digest=digest, upsert=True)
+
+    if merged:
+        refreshStats([indicatorName(filename) for filename, path in indicatorFiles(folder)])
+
+    return {
+        'loaded': sorted(digests),
+        'skipped': skipped,
+        'countries': len(merged),
+        'upserted': upserted,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Load the indicator csv files into mongo.')
+    parser.add_argument('folder', nargs='?', default=config.FILES_FOLDER)
+    parser.add_argument('--force', action='store_true', help='reload files even if they have not changed')
+    parser.add_argument('--workers', type=int, default=config.INGEST_WORKERS, help='processes parsing files in parallel')
+    args = parser.parse_args()
+
+    connect(config.DB_NAME, **config.MONGO_SETTINGS)
+    removed = dedupeCountries()
+    if removed:
+        print('merged %d duplicate countries' % removed)
+    Country.ensure_indexes()
+    store = openStore(config.STORE_FOLDER) if config.USE_COLUMN_STORE else None
+    with ProcessPoolExecutor(args.workers) as executor:
+        print(ingest(args.folder, force=args.force, store=store, executor=executor))
@@ -0,0 +1,98 @@
+import multiprocessing
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+
+class IngestJob:
+    """Progress of one background ingest, updated by ingest() as it goes."""
+
+    def __init__(self):
+        self.id = uuid.uuid4().hex
+        self.state = 'queued'
+        self.rowsParsed = 0
+        self.documentsUpserted = 0
+        self.started = None
+        self.finished = None
+        self.result = None
+        self.error = None
+        self.lock = threading.Lock()
+
+    def parsed(self, rows):
+        with self.lock:
+            self.rowsParsed += rows
+
+    def upserted(self, documents):
+        with self.lock:
+            self.documentsUpserted += documents
+
+    def status(self):
+        with self.lock:
+            end = self.finished or time.time()
+            elapsed = end - self.started if self.started else 0.0
+            return {
+                'id': self.id,
+                'state': self.state,
+                'rowsParsed': self.rowsParsed,
+                'documentsUpserted': self.documentsUpserted,
+                'elapsed': elapsed,
+                'rowsPerSecond': self.rowsParsed / elapsed if elapsed else 0.0,
+                'documentsPerSecond': self.documentsUpserted / elapsed if elapsed else 0.0,
+                'result': self.result,
+                'error': self.error,
+            }
+
+
+class IngestRunner:
+    """Runs one ingest at a time on a background thread and keeps recent jobs.
+
+    start(run) calls run(job, executor) on a new thread, which does the work
+    and returns the job result. The parse executor is a process pool unless
+    useProcesses is off.
+    """
+
+    def __init__(self, workers=4, useProcesses=True, history=20):
+        self.workers = workers
+        self.useProcesses = useProcesses
+        self.history = history
+        self.jobs = OrderedDict()
+        self.current = None
+        self.lock = threading.Lock()
+
+    def start(self, run):
+        """Start a new job, or return the one already running."""
+        with self.lock:
+            if self.current is not None and self.current.state in ('queued', 'running'):
+                return self.current
+            job = IngestJob()
+            self.current = job
+            self.jobs[job.id] = job
+            while len(self.jobs) > self.history:
+                self.jobs.popitem(last=False)
+        threading.Thread(target=self._work, args=(job, run), name='ingest-' + job.id, daemon=True).start()
+        return job
+
+    def get(self, jobId):
+        with self.lock:
+            return self.jobs.get(jobId)
+
+    def _work(self, job, run):
+        job.started = time.time()
+        job.state = 'running'
+        if self.useProcesses:
+            #forking a process that runs request and driver threads is unsafe, start clean workers instead
+            method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+            pool = lambda workers: ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context(method))
+        else:
+            pool = ThreadPoolExecutor
+        try:
+            with pool(self.workers) as executor:
+                job.result = run(job, executor)
+            job.state = 'done'
+        except Exception as e:
+            job.error = str(e)
+            job.state = 'failed'
+        finally:
+            job.finished = time.time()
@@ -0,0 +1,46 @@
+import threading
+
+from codes import ALIASES
+from models import Country
+
+
+class CountryLookup:
+    """In-process map from document id, name, ISO code or alias to the stored country name.
+
+    Names, codes and aliases match in any case. The map is built from one
+    query on first use and rebuilt after reset(), which every write calls.
+    """
+
+    def __init__(self):
+        self.keys = None
+        self.generation = 0
+        self.lock = threading.Lock()
+
+    def reset(self):
+        with self.lock:
+            self.keys = None
+            self.generation += 1
+
+    def _build(self):
+        keys = {}
+        for doc in Country._get_collection().find({}, {'name': 1, 'code': 1}):
+            name = doc['name']
+            keys[str(doc['_id'])] = name
+            keys[name.lower()] = name
+            if doc.get('code'):
+                keys[doc['code'].lower()] = name
+        for alias, name in ALIASES.items():
+            if name.lower() in keys:
+                keys.setdefault(alias.lower(), name)
+        return keys
+
+    def resolve(self, key):
+        keys = self.keys
+        if keys is None:
+            generation = self.generation
+            keys = self._build()
+            with self.lock:
+                #a write while building means the map may already be stale
+                if generation == self.generation:
+                    self.keys = keys
+        return keys.get(key) or keys.get(key.lower())
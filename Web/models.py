@@ -0,0 +1,23 @@
+from mongoengine import *
+
+
+#Country class
+class Country(Document):
+    name = StringField(required=True, unique=True)
+    #ISO 3166-1 alpha-3 code, see codes.py
+    code = StringField(unique=True, sparse=True)
+    data = DictField()
+
+
+#Content hash of every indicator file that has been loaded, so unchanged files are skipped
+class IngestedFile(Document):
+    name = StringField(required=True, unique=True)
+    digest = StringField()
+
+
+#Precomputed per-year summary of one indicator, used for chart axes and tooltips
+class IndicatorStats(Document):
+    name = StringField(required=True, unique=True)
+    min = FloatField()
+    max = FloatField()
+    years = DictField()
@@ -0,0 +1,150 @@
+from bson import json_util
+
+from models import Country
+from store import toJsonList
+
+
+def toNumber(value):
+    if value is None or value == '':
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+def fromStore(store, names):
+    """The store indicators for names, or None when any of them has to come from mongo.
+
+    Each indicator is fetched once, so one being swapped out meanwhile cannot break a query.
+    """
+    if store is None:
+        return None
+    indicators = [store.get(name) for name in names]
+    return None if None in indicators else indicators
+
+
+def storedRows(name):
+    """Read one indicator back out of mongo as {country: {year: value}}."""
+    projection = {'name': 1, 'data.' + name: 1}
+    query = {'data.' + name: {'$exists': True}}
+    return {doc['name']: doc['data'][name] for doc in Country._get_collection().find(query, projection)}
+
+
+def yearSlice(store, year, names):
+    """Values of the given indicators for one year, one row per country.
+
+    {"year": 2000, "indicators": [...], "countries": [...], "values": [[...], ...]}
+    """
+    indicators = fromStore(store, names)
+    if indicators is not None:
+        countries = []
+        rows = {}
+        for j, indicator in enumerate(indicators):
+            column = indicator.column(year)
+            if column is None:
+                continue
+            for country, value in zip(indicator.countries, toJsonList(column)):
+                if country not in rows:
+                    countries.append(country)
+                    rows[country] = [None] * len(names)
+                rows[country][j] = value
+        values = [rows[c] for c in countries]
+    else:
+        key = str(year)
+        projection = {'name': 1, '_id': 0}
+        for name in names:
+            projection['data.%s.%s' % (name, key)] = 1
+        countries = []
+        values = []
+        for doc in Country._get_collection().find({}, projection):
+            data = doc.get('data', {})
+            if not any(name in data for name in names):
+                continue
+            countries.append(doc['name'])
+            values.append([toNumber(data.get(name, {}).get(key)) for name in names])
+    return {'year': year, 'indicators': names, 'countries': countries, 'values': values}
+
+
+def countrySeries(store, country, names, lo=None, hi=None):
+    """Year series of the given indicators for one country, limited to lo..hi.
+
+    {"name": "Albania", "years": [...], "indicators": {"fertility": [...], ...}}
+    """
+    series = {}
+    indicators = fromStore(store, names)
+    if indicators is not None:
+        years = sorted({y for indicator in indicators if country in indicator.countryIndex
+                        for y in indicator.years
+                        if (lo is None or y >= lo) and (hi is None or y <= hi)})
+        for name, indicator in zip(names, indicators):
+            row = indicator.row(country)
+            values = toJsonList(row) if row is not None else []
+            byYear = dict(zip(indicator.years, values))
+            series[name] = [byYear.get(y) for y in years]
+    else:
+        projection = {'_id': 0}
+        for name in names:
+            projection['data.' + name] = 1
+        doc = Country._get_collection().find_one({'name': country}, projection) or {}
+        data = doc.get('data', {})
+        years = sorted({int(y) for name in names for y in data.get(name, {})
+                        if (lo is None or int(y) >= lo) and (hi is None or int(y) <= hi)})
+        for name in names:
+            values = data.get(name, {})
+            series[name] = [toNumber(values.get(str(y))) for y in years]
+    return {'name': country, 'years': years, 'indicators': series}
+
+
+def indicatorTables(store, names):
+    """Whole indicator matrices: {name: {"countries": [...], "years": [...], "values": [[...]]}}."""
+    indicators = fromStore(store, names)
+    if indicators is not None:
+        tables = {}
+        for name, indicator in zip(names, indicators):
+            tables[name] = {
+                'countries': indicator.countries,
+                'years': indicator.years,
+                'values': toJsonList(indicator.values),
+            }
+        return tables
+
+    tables = {name: {'countries': [], 'years': [], 'values': []} for name in names}
+    projection = {'name': 1, '_id': 0}
+    for name in names:
+        projection['data.' + name] = 1
+    docs = list(Country._get_collection().find({}, projection))
+    for name in names:
+        years = sorted({int(y) for doc in docs for y in doc.get('data', {}).get(name, {})})
+        table = tables[name]
+        table['years'] = years
+        for doc in docs:
+            values = doc.get('data', {}).get(name)
+            if values:
+                table['countries'].append(doc['name'])
+                table['values'].append([toNumber(values.get(str(y))) for y in years])
+    return tables
+
+
+def streamCountries(mode, names=None, batchSize=100):
+    """Yield the country documents as text chunks without building the whole body.
+
+    mode "ndjson" writes one document per line, mode "json" writes a single
+    JSON array. The cursor is read batchSize documents at a time.
+    """
+    projection = None
+    if names:
+        projection = {'name': 1}
+        for name in names:
+            projection['data.' + name] = 1
+    cursor = Country._get_collection().find({}, projection, batch_size=batchSize)
+    if mode == 'ndjson':
+        for doc in cursor:
+            yield json_util.dumps(doc) + '\n'
+        return
+    yield '['
+    first = True
+    for doc in cursor:
+        yield (json_util.dumps(doc) if first else ',' + json_util.dumps(doc))
+        first = False
+    yield ']'
@@ -34,13 +34,35 @@ var div;
 $(function () {
     console.log("Hi Everybody!");
     console.log("Hi Dr. Nick!");
-    //Auto load countries
-    $.get('/countries', function (response) {
-        createChart(JSON.parse(response));
+    //Auto load the countries for the starting year
+    loadYear(createChart);
+});
+
+
+//Fetch the current x, y and population values of every country for one year
+function loadYear(callback) {
+    var indicators = [xCategory, yCategory, population];
+    $.get('/countries', { year: year, indicators: indicators.join(',') }, function (response) {
+        //ignore answers for a year the slider has already moved past
+        if (response.year != year) {
+            return;
+        }
+        callback(toRows(response));
     }).fail(function (error) {
         console.error(error);
     })
-});
+}
+
+//Turn the compact year slice into one object per country
+function toRows(slice) {
+    return slice.countries.map(function (name, i) {
+        var row = { name: name, data: {} };
+        slice.indicators.forEach(function (indicator, j) {
+            row.data[indicator] = slice.values[i][j];
+        });
+        return row;
+    });
+}
 
 
 //Change the category for an axis
@@ -51,49 +73,56 @@ function changeCat(newcat, catType)
     {
         //updating category to new pick
         xCategory = newcat;
-        xMaxValue = max([xCategory]);
-        //updating range on x-axis
-        x = d3.scaleLinear()
-            .domain([0, xMaxValue])
-            .range([ 0,width ]);
-        
-        xaxis.call(d3.axisBottom(x));
+        max(xCategory, function (maxVal) {
+            updateXAxis(maxVal);
+            //Update circles on graph
+            loadYear(moveCircles);
+        });
     }
     else
     {
         //updating category to new pick
         yCategory = newcat;
-        yMaxValue = max(yCategory);
-        //updating range on y-axis
-        y = d3.scaleLinear()
-            .domain([0, yMaxValue])
-            .range([ height, 0]);
-        
-        yaxis.call(d3.axisLeft(y));
+        max(yCategory, function (maxVal) {
+            updateYAxis(maxVal);
+            //Update circles on graph
+            loadYear(moveCircles);
+        });
     }
-    //Update circles on graph    
-    moveCircles();
 }
 
-//Find maximum value in the database for the category(d)
-function max(d){
-    var maxVal = 0;
-    for(var i=0; i<returnedCountries.length; i++){
-        if (d in returnedCountries[i].data){
-            var country = returnedCountries[i].data[d];
-            Object.keys(country).forEach(function(key) {
-                var val = parseFloat(country[key]);
-                if (val > maxVal){
-                    maxVal = val;  
-                }  
-            });
-        }
-    }
+//updating range on x-axis
+function updateXAxis(maxVal) {
+    xMaxValue = maxVal;
+    x = d3.scaleLinear()
+        .domain([0, xMaxValue])
+        .range([ 0,width ]);
 
-    if (maxVal > 130000){
-        maxVal = 130000;
-    }
-    return maxVal;	
+    xaxis.call(d3.axisBottom(x));
+}
+
+//updating range on y-axis
+function updateYAxis(maxVal) {
+    yMaxValue = maxVal;
+    y = d3.scaleLinear()
+        .domain([0, yMaxValue])
+        .range([ height, 0]);
+
+    yaxis.call(d3.axisLeft(y));
+}
+
+//Find maximum value over all years for the category(d) and pass it to callback
+function max(d, callback){
+    $.get('/stats', { indicator: d }, function (response) {
+        var maxVal = response.max;
+
+        if (maxVal > 130000){
+            maxVal = 130000;
+        }
+        callback(maxVal);
+    }).fail(function (error) {
+        console.error(error);
+    })
 }
 
 //when slider is updated on the webpage, updates circle data
@@ -102,21 +131,26 @@ slider.oninput = function() {
     year = slider.value;
     yearLabelObj.innerHTML = year;
     //update circle data
-    moveCircles();
+    loadYear(moveCircles);
 }
 
 //Update the information of the circles and add them to the graph
-function moveCircles(){
+function moveCircles(rows){
+    if (rows) {
+        returnedCountries = rows;
+    }
 
     //Remove old circles
-        g.selectAll("circle").remove();
+        svg.selectAll("g.country").remove();
+        g = svg.selectAll("g.country")
+            .data(returnedCountries).enter().append("g").attr("class", "country");
     //Add new circles to the
         g.append("circle")
             .attr("r", function(d){
                 //Check for data, give default value when data is not found
-                if(d && d.data && d.data[population] && d.data[population][year])
+                if(d && d.data && d.data[population])
                 {
-                    return popScale(d.data[population][year])
+                    return popScale(d.data[population])
                 }
                 else{
                     return popScale(10000)
@@ -126,18 +160,18 @@ function moveCircles(){
             .attr("stroke", "black")
             .attr("cx", function(d){
                 
-                if(d && d.data && d.data[xCategory] && d.data[xCategory][year])
+                if(d && d.data && d.data[xCategory])
                 {
-                    return x(d.data[xCategory][year])
+                    return x(d.data[xCategory])
                 }
                 else{
                     return x(0)
                 }})
             .attr("cy", function(d){
                 
-                if(d && d.data && d.data[yCategory] && d.data[yCategory][year])
+                if(d && d.data && d.data[yCategory])
                 {
-                    return y(d.data[yCategory][year])
+                    return y(d.data[yCategory])
                 }
                 else{
                     return y(0)
@@ -149,7 +183,7 @@ function moveCircles(){
                 div.transition(200)
                     .style("opacity", 1)
                     .style("fill", "black");
-                div.html("County: " + d.name + "<br/>" + "Population: " + d.data.population_total[year])
+                div.html("County: " + d.name + "<br/>" + "Population: " + d.data[population])
                     .style("left", (d3.event.pageX) + "px")
                     .style("top", (d3.event.pageY - 50) + "px");
                 })
@@ -177,8 +211,7 @@ function createChart(response) {
     .attr("class", "tooltip")				
     .style("opacity", 0);
 
-    //create the svg and g for all returned countries data
-    g = d3.select("svg").selectAll("g").data(returnedCountries);
+    //create the svg for all returned countries data
     svg = d3.select("svg")
                 .attr("width", width + margin.left + margin.right)
                 .attr("height", height + margin.top + margin.bottom)
@@ -193,9 +226,7 @@ function createChart(response) {
                   .style("border-radius", "5px")
                   .style("padding", "10px")
                   .style("color", "white")
-    //get max value for x Axis
-    xMaxValue = max([xCategory]);
-    //add x axis
+    //add x axis, its range is set once the max value has loaded
     x = d3.scaleLinear()
         .domain([0, xMaxValue])
         .range([ 0,width ]);
@@ -206,9 +237,7 @@ function createChart(response) {
         .attr("class", "x-axis")
         .call(d3.axisBottom(x));
         
-    //get max value for y Axis
-    yMaxValue = max(yCategory);
-    //add y axis
+    //add y axis, its range is set once the max value has loaded
     y = d3.scaleLinear()
         .domain([0, yMaxValue])
         .range([ height, 0]);
@@ -218,25 +247,30 @@ function createChart(response) {
         .attr("class", "y-axis")
         .call(d3.axisLeft(y));
     
-        //max population and create scale for population information
-    var maxPop = max(population);
+        //create scale for population information
     popScale = d3.scaleLinear()
         .domain([5000, 1500000000])
         .range([2, 50]);
 
-    g = svg.selectAll("g")
-        .data(returnedCountries).enter().append("g");
-
         //add circles to graph
     moveCircles();
-            
+
+    //get max values for the axes and redraw
+    max(xCategory, function (maxVal) {
+        updateXAxis(maxVal);
+        moveCircles();
+    });
+    max(yCategory, function (maxVal) {
+        updateYAxis(maxVal);
+        moveCircles();
+    });
 }
 
 //go through years and update graph until reaching 2018
 async function playButton() {
     while(year<=2018)
     {
-        await setTimeout(moveCircles(), 1000);
+        await setTimeout(loadYear(moveCircles), 1000);
         year++;
 
     }
@@ -0,0 +1,98 @@
+import threading
+
+from models import IndicatorStats
+from queries import storedRows, toNumber
+
+#indicator used to weight the population-weighted means
+POPULATION = 'population_total'
+PERCENTILES = (10, 25, 50, 75, 90)
+
+#bumped by dropStats, so a refresh that read the data before a write does not store its summary
+generation = 0
+generationLock = threading.Lock()
+
+
+def percentile(ordered, q):
+    """Linear interpolated q-th percentile of an already sorted list."""
+    pos = (len(ordered) - 1) * q / 100.0
+    lo = int(pos)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (pos - lo)
+
+
+def yearStats(values, weights):
+    ordered = sorted(values)
+    summary = {
+        'count': len(ordered),
+        'min': ordered[0],
+        'max': ordered[-1],
+        'mean': sum(ordered) / len(ordered),
+    }
+    for q in PERCENTILES:
+        summary['p%d' % q] = percentile(ordered, q)
+    totalWeight = sum(w for v, w in weights)
+    summary['weightedMean'] = sum(v * w for v, w in weights) / totalWeight if totalWeight else None
+    summary['population'] = totalWeight
+    return summary
+
+
+def computeStats(rows, population):
+    """Summarise {country: {year: value}} per year, weighting by population[country][year]."""
+    byYear = {}
+    for country, values in rows.items():
+        people = population.get(country, {})
+        for year, value in values.items():
+            value = toNumber(value)
+            if value is None:
+                continue
+            yearValues, yearWeights = byYear.setdefault(year, ([], []))
+            yearValues.append(value)
+            weight = toNumber(people.get(year))
+            if weight:
+                yearWeights.append((value, weight))
+    years = {year: yearStats(values, weights) for year, (values, weights) in byYear.items()}
+    return {
+        'min': min((s['min'] for s in years.values()), default=None),
+        'max': max((s['max'] for s in years.values()), default=None),
+        'years': years,
+    }
+
+
+def refreshStats(names):
+    """Recompute and store the summaries of the given indicators from mongo.
+
+    Returns the summaries by name. When a write drops summaries while they
+    are being computed they are still returned but not stored.
+    """
+    start = generation
+    population = storedRows(POPULATION)
+    fresh = {}
+    for name in names:
+        rows = population if name == POPULATION else storedRows(name)
+        summary = computeStats(rows, population)
+        if not summary['years']:
+            continue
+        with generationLock:
+            if start == generation:
+                IndicatorStats.objects(name=name).update_one(upsert=True, **{'set__' + k: v for k, v in summary.items()})
+        fresh[name] = IndicatorStats(name=name, **summary)
+    return fresh
+
+
+def dropStats(names=None):
+    """Forget summaries that no longer match the data, they are rebuilt on the next read."""
+    global generation
+    with generationLock:
+        generation += 1
+        if names is None:
+            IndicatorStats.objects.delete()
+        else:
+            IndicatorStats.objects(name__in=list(names)).delete()
+
+
+def getStats(name):
+    """Summary of one indicator, computed on first use. None when there is no data."""
+    stats = IndicatorStats.objects(name=name).first()
+    if stats is None:
+        stats = refreshStats([name]).get(name)
+    return stats
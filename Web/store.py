@@ -0,0 +1,104 @@
+import json
+import os
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class Indicator:
+    """One indicator file as a dense country x year float64 matrix (NaN where missing)."""
+
+    def __init__(self, name, countries, years, values):
+        self.name = name
+        self.countries = countries
+        self.years = years
+        self.values = values
+        self.countryIndex = {c: i for i, c in enumerate(countries)}
+        self.yearIndex = {y: i for i, y in enumerate(years)}
+
+    def column(self, year):
+        i = self.yearIndex.get(year)
+        if i is None:
+            return None
+        return self.values[:, i]
+
+    def row(self, country):
+        i = self.countryIndex.get(country)
+        if i is None:
+            return None
+        return self.values[i]
+
+
+class ColumnStore:
+    """Memory-mapped indicator matrices persisted as <indicator>.npy + <indicator>.json."""
+
+    def __init__(self, folder):
+        if np is None:
+            raise RuntimeError('the column store needs numpy')
+        self.folder = folder
+        self.indicators = {}
+
+    def _paths(self, name):
+        base = os.path.join(self.folder, name)
+        return base + '.npy', base + '.json'
+
+    def load(self):
+        if not os.path.isdir(self.folder):
+            return self
+        for filename in os.listdir(self.folder):
+            if filename.endswith('.json'):
+                self._map(os.path.splitext(filename)[0])
+        return self
+
+    def _map(self, name):
+        matrixPath, indexPath = self._paths(name)
+        with open(indexPath) as f:
+            index = json.load(f)
+        values = np.load(matrixPath, mmap_mode='r')
+        self.indicators[name] = Indicator(name, index['countries'], index['years'], values)
+
+    def save(self, name, rows):
+        """Write one indicator from {country: {year: value}} and remap it."""
+        countries = list(rows)
+        years = sorted({int(y) for values in rows.values() for y in values})
+        yearIndex = {y: i for i, y in enumerate(years)}
+        matrix = np.full((len(countries), len(years)), np.nan, dtype=np.float64)
+        for i, country in enumerate(countries):
+            for year, value in rows[country].items():
+                try:
+                    matrix[i, yearIndex[int(year)]] = float(value)
+                except ValueError:
+                    pass
+
+        os.makedirs(self.folder, exist_ok=True)
+        matrixPath, indexPath = self._paths(name)
+        #write to temporary files first so a running reader never maps half a file
+        with open(matrixPath + '.tmp', 'wb') as f:
+            np.save(f, matrix)
+        with open(indexPath + '.tmp', 'w') as f:
+            json.dump({'countries': countries, 'years': years}, f)
+        os.replace(matrixPath + '.tmp', matrixPath)
+        os.replace(indexPath + '.tmp', indexPath)
+        self._map(name)
+
+    def __contains__(self, name):
+        return name in self.indicators
+
+    def get(self, name):
+        return self.indicators.get(name)
+
+
+def toJsonList(values):
+    """Turn a float array (1 or 2 dimensional) into lists with NaN replaced by None."""
+    out = values.astype(object)
+    out[np.isnan(values)] = None
+    return out.tolist()
+
+
+def openStore(folder):
+    """Return the loaded column store for folder, or None when numpy is missing."""
+    if np is None:
+        return None
+    return ColumnStore(folder).load()
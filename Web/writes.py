@@ -0,0 +1,180 @@
+import math
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import Future
+
+from bson import ObjectId
+from pymongo import UpdateOne, DeleteOne
+from pymongo.errors import BulkWriteError
+
+from codes import CODES, canonicalName
+from models import Country
+
+
+#kind is 'upsert' or 'delete', target is a country name (or id for deletes),
+#fields is the $set document of an upsert
+Write = namedtuple('Write', ['kind', 'target', 'fields'])
+
+
+def upsertWrite(item):
+    """Build the upsert for one {"name": ..., "code": ..., "data": {indicator: {year: value}}} item."""
+    if not isinstance(item, dict) or not isinstance(item.get('name'), str) or not item['name']:
+        raise ValueError('every country needs a name')
+    data = item.get('data', {})
+    if not isinstance(data, dict):
+        raise ValueError('data must be an object of indicators')
+    fields = {}
+    for indicator, values in data.items():
+        #indicator names become part of mongo field paths
+        if not indicator or '.' in indicator or '$' in indicator:
+            raise ValueError('invalid indicator name %r' % indicator)
+        if not isinstance(values, dict):
+            raise ValueError('indicator %s must be an object of years' % indicator)
+        for year, value in values.items():
+            if not year.isdecimal():
+                raise ValueError('year %r of %s must be a whole number' % (year, indicator))
+            #stored as text like the values loaded from the csv files
+            fields['data.%s.%d' % (indicator, int(year))] = numberText(value, indicator, year)
+    name = canonicalName(item['name'])
+    code = item.get('code', CODES.get(name))
+    if code is not None:
+        if not isinstance(code, str):
+            raise ValueError('code must be a string')
+        fields['code'] = code.upper()
+    return Write('upsert', name, fields)
+
+
+def numberText(value, indicator, year):
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        raise ValueError('value of %s %s must be a number' % (indicator, year))
+    try:
+        number = float(value)
+    except ValueError:
+        raise ValueError('value of %s %s must be a number' % (indicator, year))
+    if not math.isfinite(number):
+        raise ValueError('value of %s %s must be a finite number' % (indicator, year))
+    return str(value).strip()
+
+
+def deleteWrite(country_id):
+    if not isinstance(country_id, str) or not country_id:
+        raise ValueError('country ids must be non-empty strings')
+    return Write('delete', country_id, None)
+
+
+def countryFilter(target):
+    if ObjectId.is_valid(target):
+        return {'$or': [{'name': target}, {'_id': ObjectId(target)}]}
+    return {'name': target}
+
+
+def toOperation(write):
+    if write.kind == 'upsert':
+        update = {'$set': write.fields} if write.fields else {'$setOnInsert': {'data': {}}}
+        return UpdateOne({'name': write.target}, update, upsert=True)
+    return DeleteOne(countryFilter(write.target))
+
+
+def applyWrites(writes):
+    """Send writes to mongo as ordered bulk operations and return one result per write.
+
+    A failing write is reported and the writes after it are retried, so one
+    bad item does not sink the rest of the batch.
+    """
+    collection = Country._get_collection()
+    results = [None] * len(writes)
+
+    #one query tells which deletes will find something, bulk results only carry totals
+    deleteTargets = [w.target for w in writes if w.kind == 'delete']
+    existing = set()
+    if deleteTargets:
+        ids = [ObjectId(t) for t in deleteTargets if ObjectId.is_valid(t)]
+        query = {'$or': [{'name': {'$in': deleteTargets}}, {'_id': {'$in': ids}}]}
+        for doc in collection.find(query, {'name': 1}):
+            existing.add(doc['name'])
+            existing.add(str(doc['_id']))
+
+    start = 0
+    while start < len(writes):
+        batch = writes[start:]
+        try:
+            result = collection.bulk_write([toOperation(w) for w in batch], ordered=True)
+            upserted = result.upserted_ids
+            failed = len(batch)
+        except BulkWriteError as e:
+            upserted = {u['index']: u['_id'] for u in e.details.get('upserted', [])}
+            error = e.details['writeErrors'][0]
+            failed = error['index']
+            results[start + failed] = {'status': 'error', 'error': error.get('errmsg', 'write failed')}
+        for i, write in enumerate(batch[:failed]):
+            results[start + i] = writeResult(write, i in upserted, existing)
+        start += failed + 1
+    return results
+
+
+def writeResult(write, upserted, existing):
+    if write.kind == 'upsert':
+        return {'status': 'created' if upserted else 'updated'}
+    if write.target in existing:
+        existing.discard(write.target)
+        return {'status': 'deleted'}
+    return {'status': 'not found'}
+
+
+class WriteBehindQueue:
+    """Collects writes from request threads and applies them in bulk.
+
+    A background thread hands everything pending to flush(writes) once
+    maxItems writes are waiting or the oldest has waited maxDelay seconds.
+    submit() returns a Future per write that receives its result.
+    """
+
+    def __init__(self, flush, maxItems=500, maxDelay=0.05):
+        self.flush = flush
+        self.maxItems = maxItems
+        self.maxDelay = maxDelay
+        self.pending = []
+        self.oldest = None
+        self.condition = threading.Condition()
+        self.thread = None
+
+    def submit(self, writes):
+        futures = [Future() for w in writes]
+        with self.condition:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name='write-behind', daemon=True)
+                self.thread.start()
+            if not self.pending:
+                self.oldest = time.monotonic()
+            self.pending.extend(zip(writes, futures))
+            self.condition.notify()
+        return futures
+
+    def _take(self):
+        with self.condition:
+            while True:
+                if self.pending:
+                    wait = self.oldest + self.maxDelay - time.monotonic()
+                    if len(self.pending) >= self.maxItems or wait <= 0:
+                        break
+                    self.condition.wait(wait)
+                else:
+                    self.condition.wait()
+            batch = self.pending[:self.maxItems]
+            self.pending = self.pending[self.maxItems:]
+            self.oldest = time.monotonic() if self.pending else None
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._take()
+            writes = [w for w, f in batch]
+            try:
+                results = self.flush(writes)
+            except Exception as e:
+                for w, future in batch:
+                    future.set_exception(e)
+                continue
+            for (w, future), result in zip(batch, results):
+                future.set_result(result)
@@ -1,66 +1,208 @@
-class BinarySearchTree:
+import mmap
+import os
+import pickle
+import struct
+from collections.abc import Mapping, MutableMapping, ItemsView, ValuesView
+
+
+# saved trees are MAGIC, the key count n, n+1 key offsets and n+1 value offsets
+# (little-endian uint64, from the start of the file), then the serialized keys
+# and the serialized values, both in sorted key order
+MAGIC = b'BST1'
+
+
+class TreeItemsView(ItemsView):
+    # walk the tree once instead of looking every key up again
+    def __iter__(self):
+        return self._mapping.inorder(items=True)
+
+
+class TreeValuesView(ValuesView):
+    def __iter__(self):
+        for key, val in self._mapping.inorder(items=True):
+            yield val
+
+
+class BinarySearchTree(MutableMapping):
+    """An ordered mapping kept as a binary search tree.
+
+    Behaves like a dict (it is a MutableMapping) whose keys come out in
+    sorted order; putting an existing key replaces its value.
+    """
 
     def __init__(self):
         self.root = None
         self.size = 0
+
+    @classmethod
+    def from_sorted(cls,items):
+        """Build a height-balanced tree from (key, value) pairs in strictly ascending key order.
+
+        Takes O(n): the middle pair becomes the root and each half is built the
+        same way below it, so no put or rebalancing is needed.
+        """
+        items = list(items)
+        for i in range(1,len(items)):
+            if not items[i-1][0] < items[i][0]:
+                raise ValueError('keys must be in strictly ascending order')
+        tree = cls()
+        tree.root = tree._buildBalanced(items)
+        tree.size = len(items)
+        return tree
+
+    @classmethod
+    def from_iterable(cls,items):
+        """Build a height-balanced tree from (key, value) pairs (or a dict) in any order.
+
+        Pairs are sorted by key first; when a key repeats the last value wins.
+        """
+        return cls.from_sorted(cls._sortedUnique(items))
+
+    @staticmethod
+    def _sortedUnique(items):
+        # (key, value) pairs sorted by key, keeping the last value of a repeated key
+        if hasattr(items,'items'):
+            items = items.items()
+        ordered = sorted(items,key=lambda kv: kv[0])
+        unique = []
+        for kv in ordered:
+            if unique and not unique[-1][0] < kv[0]:
+                unique[-1] = kv
+            else:
+                unique.append(kv)
+        return unique
+
+    def _buildBalanced(self,items):
+        root = None
+        stack = [(0,len(items),None,False)]
+        while stack:
+            lo, hi, parent, isLeft = stack.pop()
+            if lo >= hi:
+                continue
+            mid = (lo + hi) // 2
+            node = TreeNode(items[mid][0],items[mid][1],parent=parent)
+            node.size = hi - lo
+            # a subtree of n nodes built this way is floor(log2 n) high
+            node.balanceFactor = (mid - lo).bit_length() - (hi - mid - 1).bit_length()
+            if parent == None:
+                root = node
+            elif isLeft:
+                parent.leftChild = node
+            else:
+                parent.rightChild = node
+            stack.append((lo,mid,node,True))
+            stack.append((mid+1,hi,node,False))
+        return root
     
     def put(self,key,val):
         if self.root:
-            self._put(key,val,self.root)
+            if self._put(key,val,self.root) == None:
+                return
         else:
             self.root = TreeNode(key,val)
         self.size = self.size + 1
 
     def _put(self,key,val,currentNode):
-        if key < currentNode.key:
-            if currentNode.hasLeftChild():
-                self._put(key,val,currentNode.leftChild)
-            else:
-                currentNode.leftChild = TreeNode(key,val,parent=currentNode)
-        else:
-            if currentNode.hasRightChild():
-                self._put(key,val,currentNode.rightChild)
+        # walk down to a free spot and hang the new node there, returns the new node,
+        # or None when the key was already in the tree and only its value changed
+        while True:
+            if key == currentNode.key:
+                currentNode.payload = val
+                # nothing was added, take back the counts made on the way down
+                currentNode = currentNode.parent
+                while currentNode:
+                    currentNode.size -= 1
+                    currentNode = currentNode.parent
+                return None
+            currentNode.size += 1
+            if key < currentNode.key:
+                if currentNode.hasLeftChild():
+                    currentNode = currentNode.leftChild
+                else:
+                    currentNode.leftChild = TreeNode(key,val,parent=currentNode)
+                    return currentNode.leftChild
             else:
-                currentNode.rightChild = TreeNode(key,val,parent=currentNode)
+                if currentNode.hasRightChild():
+                    currentNode = currentNode.rightChild
+                else:
+                    currentNode.rightChild = TreeNode(key,val,parent=currentNode)
+                    return currentNode.rightChild
             
     def __setitem__(self,k,v):
         self.put(k,v)
 
-    def get(self,key):
-        if self.root:
-            res = self._get(key,self.root)
-            if res:
-                return res.payload
-            else:
-                return None
+    def get(self,key,default=None):
+        res = self._get(key,self.root)
+        if res:
+            return res.payload
         else:
-            return None
+            return default
         
     def _get(self,key,currentNode):
-        if not currentNode:
-            return None
-        elif currentNode.key == key:
-            return currentNode
-        elif key < currentNode.key:
-            return self._get(key,currentNode.leftChild)
-        else:
-            return self._get(key,currentNode.rightChild)
+        while currentNode:
+            if currentNode.key == key:
+                return currentNode
+            elif key < currentNode.key:
+                currentNode = currentNode.leftChild
+            else:
+                currentNode = currentNode.rightChild
+        return None
             
         
     def __getitem__(self,key):
-        res = self.get(key)
+        res = self._get(key,self.root)
         if res:
-            return res
+            return res.payload
         else:
-            raise KeyError('Error, key not in tree')
-            
+            raise KeyError(key)
 
     def __contains__(self,key):
         if self._get(key,self.root):
             return True
         else:
             return False
-        
+
+    def setdefault(self,key,default=None):
+        res = self._get(key,self.root)
+        if res:
+            return res.payload
+        self.put(key,default)
+        return default
+
+    def pop(self,key,*default):
+        res = self._get(key,self.root)
+        if not res:
+            if default:
+                return default[0]
+            raise KeyError(key)
+        val = res.payload
+        self._removeNode(res)
+        return val
+
+    def update(self,other=(),**kwds):
+        """Put every pair of a mapping or iterable of (key, value) pairs.
+
+        An empty tree is bulk loaded balanced from the sorted pairs instead
+        of putting them one by one.
+        """
+        if self.root == None:
+            pairs = list(other.items() if hasattr(other,'items') else other) + list(kwds.items())
+            items = self._sortedUnique(pairs)
+            self.root = self._buildBalanced(items)
+            self.size = len(items)
+        else:
+            MutableMapping.update(self,other,**kwds)
+
+    def items(self):
+        return TreeItemsView(self)
+
+    def values(self):
+        return TreeValuesView(self)
+
+    def clear(self):
+        self.root = None
+        self.size = 0
+
     def length(self):
         return self.size
 
@@ -68,26 +210,46 @@ class BinarySearchTree:
         return self.size
 
     def __iter__(self):
-        return self.root.__iter__()
+        return self.inorder()
+
+    def height(self):
+        """Number of edges on the longest root to leaf path, -1 for an empty tree."""
+        best = -1
+        stack = [(self.root,0)] if self.root else []
+        while stack:
+            node, depth = stack.pop()
+            best = max(best,depth)
+            if node.hasLeftChild():
+                stack.append((node.leftChild,depth+1))
+            if node.hasRightChild():
+                stack.append((node.rightChild,depth+1))
+        return best
     
     def delete(self,key):
-        if self.size > 1:
-            nodeToRemove = self._get(key,self.root)
-            if nodeToRemove:
-                self.remove(nodeToRemove)
-                self.size = self.size-1
-            else:
-                raise KeyError('Error, key not in tree')
-        elif self.size == 1 and self.root.key == key:
-            self.root = None
-            self.size = self.size - 1
+        nodeToRemove = self._get(key,self.root)
+        if nodeToRemove:
+            self._removeNode(nodeToRemove)
         else:
             raise KeyError('Error, key not in tree')
 
+    def _removeNode(self,node):
+        if self.size > 1:
+            self.remove(node)
+        else:
+            self.root = None
+        self.size = self.size - 1
+
     def __delitem__(self,key):
         self.delete(key)
     
     def remove(self,currentNode):
+        # the node that gets unlinked is the successor for interior nodes,
+        # every subtree above it loses one key
+        unlinked = currentNode.findSuccessor() if currentNode.hasBothChildren() else currentNode
+        ancestor = unlinked.parent
+        while ancestor:
+            ancestor.size -= 1
+            ancestor = ancestor.parent
         if currentNode.isLeaf(): #leaf
             if currentNode == currentNode.parent.leftChild:
                 currentNode.parent.leftChild = None
@@ -124,32 +286,303 @@ class BinarySearchTree:
                                        currentNode.rightChild.leftChild,
                                        currentNode.rightChild.rightChild)
 
-    def inorder(self):
-        self._inorder(self.root)
+    def inorder(self,items=False):
+        """Keys (or (key, value) pairs when items is set) in sorted order."""
+        stack = []
+        node = self.root
+        while stack or node:
+            if node:
+                stack.append(node)
+                node = node.leftChild
+            else:
+                node = stack.pop()
+                yield (node.key,node.payload) if items else node.key
+                node = node.rightChild
+
+    def preorder(self,items=False):
+        """Keys (or (key, value) pairs) with every node before its children."""
+        stack = [self.root] if self.root else []
+        while stack:
+            node = stack.pop()
+            yield (node.key,node.payload) if items else node.key
+            if node.rightChild:
+                stack.append(node.rightChild)
+            if node.leftChild:
+                stack.append(node.leftChild)
+
+    def postorder(self,items=False):
+        """Keys (or (key, value) pairs) with every node after its children."""
+        stack = []
+        node = self.root
+        lastVisited = None
+        while stack or node:
+            if node:
+                stack.append(node)
+                node = node.leftChild
+            else:
+                top = stack[-1]
+                if top.rightChild and lastVisited is not top.rightChild:
+                    node = top.rightChild
+                else:
+                    yield (top.key,top.payload) if items else top.key
+                    lastVisited = stack.pop()
+
+    def range(self,lo,hi,items=False):
+        """Keys (or (key, value) pairs) with lo <= key <= hi, in order.
+
+        Subtrees entirely outside the bounds are never visited, so this costs
+        O(log n + number of keys returned).
+        """
+        stack = []
+        node = self.root
+        while stack or node:
+            if node:
+                if node.key < lo:
+                    node = node.rightChild
+                else:
+                    stack.append(node)
+                    node = node.leftChild
+            else:
+                node = stack.pop()
+                if hi < node.key:
+                    return
+                yield (node.key,node.payload) if items else node.key
+                node = node.rightChild
+
+    def select(self,k):
+        """The k-th smallest key, counting from 0."""
+        if k < 0 or k >= self.size:
+            raise IndexError('Error, rank out of range')
+        node = self.root
+        while True:
+            leftSize = node.leftSize()
+            if k < leftSize:
+                node = node.leftChild
+            elif k == leftSize:
+                return node.key
+            else:
+                k = k - leftSize - 1
+                node = node.rightChild
+
+    def rank(self,key):
+        """Number of keys smaller than key (key need not be in the tree)."""
+        count = 0
+        node = self.root
+        while node:
+            if key <= node.key:
+                node = node.leftChild
+            else:
+                count = count + node.leftSize() + 1
+                node = node.rightChild
+        return count
+
+    def _countUpTo(self,key):
+        # number of keys <= key
+        count = 0
+        node = self.root
+        while node:
+            if key < node.key:
+                node = node.leftChild
+            else:
+                count = count + node.leftSize() + 1
+                node = node.rightChild
+        return count
+
+    def count_range(self,lo,hi):
+        """Number of keys with lo <= key <= hi."""
+        if hi < lo:
+            return 0
+        return self._countUpTo(hi) - self.rank(lo)
+
+    def floor(self,key):
+        """Largest key <= key, or None."""
+        best = None
+        node = self.root
+        while node:
+            if node.key == key:
+                return node.key
+            elif key < node.key:
+                node = node.leftChild
+            else:
+                best = node.key
+                node = node.rightChild
+        return best
+
+    def ceiling(self,key):
+        """Smallest key >= key, or None."""
+        best = None
+        node = self.root
+        while node:
+            if node.key == key:
+                return node.key
+            elif key < node.key:
+                best = node.key
+                node = node.leftChild
+            else:
+                node = node.rightChild
+        return best
+
+    def save(self,path,serializer=pickle):
+        """Write the tree to path in sorted order.
+
+        serializer is anything with dumps(obj) -> bytes and loads(bytes), pickle
+        by default; load must be given the same one. The file is written next
+        to path and renamed over it, so a crash never leaves half a tree behind.
+        """
+        n = self.size
+        tmp = path + '.tmp'
+        with open(tmp,'wb') as f:
+            headerSize = len(MAGIC) + 8 + 16 * (n + 1)
+            f.write(bytes(headerSize))
+            offsets = [headerSize]
+            for key in self.inorder():
+                offsets.append(offsets[-1] + f.write(serializer.dumps(key)))
+            for val in self.values():
+                offsets.append(offsets[-1] + f.write(serializer.dumps(val)))
+            # the last key offset is also where the first value starts
+            offsets.insert(n + 1,offsets[n])
+            f.seek(0)
+            f.write(MAGIC + struct.pack('<Q',n))
+            f.write(struct.pack('<%dQ' % len(offsets),*offsets))
+        os.replace(tmp,path)
+
+    @classmethod
+    def load(cls,path,serializer=pickle,mapped=False):
+        """Read a tree written by save.
 
-    def _inorder(self,tree):
-        if tree != None:
-            self._inorder(tree.leftChild)
-            print(tree.key)
-            self._inorder(tree.rightChild)
+        By default the file is memory-mapped and a balanced tree is built from
+        it in O(n) without any put. With mapped set a read-only MappedTree is
+        returned instead, which answers lookups by binary search in the file.
+        """
+        if mapped:
+            return MappedTree(path,serializer)
+        with MappedTree(path,serializer) as saved:
+            items = list(saved.inorder(items=True))
+        tree = cls()
+        tree.root = tree._buildBalanced(items)
+        tree.size = len(items)
+        return tree
 
-    def postorder(self):
-        self._postorder(self.root)
+                
+class AVLTree(BinarySearchTree):
+    """A BinarySearchTree that keeps itself balanced.
+
+    Every node's balanceFactor is height(left) - height(right) and is kept
+    within -1..1 by rotating after each put and delete, so the height stays
+    O(log n) even when keys arrive in sorted order.
+    """
 
-    def _postorder(self, tree):
-        if tree:
-            self._postorder(tree.rightChild)
-            self._postorder(tree.leftChild)
-            print(tree.key)            
+    def _put(self,key,val,currentNode):
+        newNode = BinarySearchTree._put(self,key,val,currentNode)
+        if newNode:
+            self.updateBalance(newNode)
+        return newNode
+
+    def updateBalance(self,node):
+        # walk up while the subtree below has become one level taller
+        while True:
+            if node.balanceFactor > 1 or node.balanceFactor < -1:
+                self.rebalance(node)
+                return
+            if node.parent == None:
+                return
+            if node.isLeftChild():
+                node.parent.balanceFactor += 1
+            else:
+                node.parent.balanceFactor -= 1
+            node = node.parent
+            if node.balanceFactor == 0:
+                return
+
+    def remove(self,currentNode):
+        # the node that is physically unlinked is the successor for interior nodes
+        if currentNode.hasBothChildren():
+            removed = currentNode.findSuccessor()
+        else:
+            removed = currentNode
+        parent = removed.parent
+        fromLeft = removed.isLeftChild()
+        BinarySearchTree.remove(self,currentNode)
+        if parent == None:
+            # the root had a single leaf child that has been copied into it
+            currentNode.balanceFactor = 0
+        else:
+            self.updateBalanceDelete(parent,fromLeft)
+
+    def updateBalanceDelete(self,node,fromLeft):
+        # walk up while the subtree below has become one level shorter
+        while node != None:
+            if fromLeft:
+                node.balanceFactor -= 1
+            else:
+                node.balanceFactor += 1
+            if node.balanceFactor > 1 or node.balanceFactor < -1:
+                self.rebalance(node)
+                node = node.parent
+                if node.balanceFactor != 0:
+                    return
+            elif node.balanceFactor != 0:
+                return
+            fromLeft = node.isLeftChild()
+            node = node.parent
+
+    def rebalance(self,node):
+        if node.balanceFactor < 0:
+            if node.rightChild.balanceFactor > 0:
+                # Do an RL Rotation
+                self.rotateRight(node.rightChild)
+                self.rotateLeft(node)
+            else:
+                # single left
+                self.rotateLeft(node)
+        elif node.balanceFactor > 0:
+            if node.leftChild.balanceFactor < 0:
+                # Do an LR Rotation
+                self.rotateLeft(node.leftChild)
+                self.rotateRight(node)
+            else:
+                # single right
+                self.rotateRight(node)
 
-    def preorder(self):
-        self._preorder(self,self.root)
+    def rotateLeft(self,rotRoot):
+        newRoot = rotRoot.rightChild
+        rotRoot.rightChild = newRoot.leftChild
+        if newRoot.leftChild != None:
+            newRoot.leftChild.parent = rotRoot
+        newRoot.parent = rotRoot.parent
+        if rotRoot.isRoot():
+            self.root = newRoot
+        else:
+            if rotRoot.isLeftChild():
+                rotRoot.parent.leftChild = newRoot
+            else:
+                rotRoot.parent.rightChild = newRoot
+        newRoot.leftChild = rotRoot
+        rotRoot.parent = newRoot
+        rotRoot.updateSize()
+        newRoot.updateSize()
+        rotRoot.balanceFactor = rotRoot.balanceFactor + 1 - min(newRoot.balanceFactor, 0)
+        newRoot.balanceFactor = newRoot.balanceFactor + 1 + max(rotRoot.balanceFactor, 0)
 
-    def _preorder(self,tree):
-        if tree:
-            print(tree.key)            
-            self._preorder(tree.leftChild)
-            self._preorder(tree.rightChild)
+    def rotateRight(self,rotRoot):
+        newRoot = rotRoot.leftChild
+        rotRoot.leftChild = newRoot.rightChild
+        if newRoot.rightChild != None:
+            newRoot.rightChild.parent = rotRoot
+        newRoot.parent = rotRoot.parent
+        if rotRoot.isRoot():
+            self.root = newRoot
+        else:
+            if rotRoot.isRightChild():
+                rotRoot.parent.rightChild = newRoot
+            else:
+                rotRoot.parent.leftChild = newRoot
+        newRoot.rightChild = rotRoot
+        rotRoot.parent = newRoot
+        rotRoot.updateSize()
+        newRoot.updateSize()
+        rotRoot.balanceFactor = rotRoot.balanceFactor - 1 - max(newRoot.balanceFactor, 0)
+        newRoot.balanceFactor = newRoot.balanceFactor - 1 + min(rotRoot.balanceFactor, 0)
 
                 
 class TreeNode:
@@ -160,6 +593,8 @@ class TreeNode:
         self.rightChild = right
         self.parent = parent
         self.balanceFactor = 0
+        # number of keys in the subtree rooted here
+        self.size = 1
         
     def hasLeftChild(self):
         return self.leftChild
@@ -194,20 +629,22 @@ class TreeNode:
             self.leftChild.parent = self
         if self.hasRightChild():
             self.rightChild.parent = self
+        self.updateSize()
+
+    def leftSize(self):
+        return self.leftChild.size if self.leftChild else 0
+
+    def updateSize(self):
+        self.size = 1 + self.leftSize() + (self.rightChild.size if self.rightChild else 0)
         
     def findSuccessor(self):
-        succ = None
         if self.hasRightChild():
-            succ = self.rightChild.findMin()
-        else:
-            if self.parent:
-                if self.isLeftChild():
-                    succ = self.parent
-                else:
-                    self.parent.rightChild = None
-                    succ = self.parent.findSuccessor()
-                    self.parent.rightChild = self
-        return succ
+            return self.rightChild.findMin()
+        # climb until we come up from a left child, that parent is next in order
+        current = self
+        while current.parent and current.isRightChild():
+            current = current.parent
+        return current.parent
 
 
     def spliceOut(self):
@@ -237,19 +674,117 @@ class TreeNode:
         return current
 
     def __iter__(self):
-        """The standard inorder traversal of a binary tree."""
-        if self:
-            if self.hasLeftChild():
-                for elem in self.leftChild:
-                    yield elem
-            yield self.key
-            if self.hasRightChild():
-                for elem in self.rightChild:
-                    yield elem
+        """The standard inorder traversal of the subtree below this node."""
+        stack = []
+        node = self
+        while stack or node:
+            if node:
+                stack.append(node)
+                node = node.leftChild
+            else:
+                node = stack.pop()
+                yield node.key
+                node = node.rightChild
+
+
+class MappedTree(Mapping):
+    """Read-only ordered mapping served straight off a file written by BinarySearchTree.save.
+
+    Nothing is loaded up front: key i is deserialized from the mapped file
+    when a binary search reaches it, so opening a tree of any size is
+    immediate. Call close() (or use it in a with block) to release the file.
+    """
+
+    def __init__(self,path,serializer=pickle):
+        self.serializer = serializer
+        self.file = open(path,'rb')
+        self.map = mmap.mmap(self.file.fileno(),0,access=mmap.ACCESS_READ)
+        if self.map[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError('%s is not a saved tree' % path)
+        self.size = struct.unpack_from('<Q',self.map,len(MAGIC))[0]
+        self.keyTable = len(MAGIC) + 8
+        self.valueTable = self.keyTable + 8 * (self.size + 1)
+
+    def close(self):
+        self.map.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self,*exc):
+        self.close()
+
+    def _read(self,table,i):
+        start, end = struct.unpack_from('<2Q',self.map,table + 8 * i)
+        return self.serializer.loads(self.map[start:end])
+
+    def _bisect(self,key):
+        # index of the first stored key >= key
+        lo = 0
+        hi = self.size
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._read(self.keyTable,mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def get(self,key,default=None):
+        i = self._bisect(key)
+        if i < self.size and self._read(self.keyTable,i) == key:
+            return self._read(self.valueTable,i)
+        return default
+
+    def __getitem__(self,key):
+        i = self._bisect(key)
+        if i < self.size and self._read(self.keyTable,i) == key:
+            return self._read(self.valueTable,i)
+        raise KeyError(key)
+
+    def __contains__(self,key):
+        i = self._bisect(key)
+        return i < self.size and self._read(self.keyTable,i) == key
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        return self.inorder()
+
+    def inorder(self,items=False):
+        """Keys (or (key, value) pairs when items is set) in sorted order."""
+        # a full walk reads each offset table in one go
+        loads = self.serializer.loads
+        keyOffsets = struct.unpack_from('<%dQ' % (self.size + 1),self.map,self.keyTable)
+        if items:
+            valueOffsets = struct.unpack_from('<%dQ' % (self.size + 1),self.map,self.valueTable)
+        for i in range(self.size):
+            key = loads(self.map[keyOffsets[i]:keyOffsets[i+1]])
+            if items:
+                yield key, loads(self.map[valueOffsets[i]:valueOffsets[i+1]])
+            else:
+                yield key
+
+    def range(self,lo,hi,items=False):
+        """Keys (or (key, value) pairs) with lo <= key <= hi, in order."""
+        for i in range(self._bisect(lo),self.size):
+            key = self._read(self.keyTable,i)
+            if hi < key:
+                return
+            yield (key,self._read(self.valueTable,i)) if items else key
+
+    def items(self):
+        return TreeItemsView(self)
+
+    def values(self):
+        return TreeValuesView(self)
                     
 import sys
-import os
 import unittest
+from collections import deque
 
 class Graph:
     def __init__(self):
@@ -283,6 +818,37 @@ class Graph:
         
     def __iter__(self):
         return iter(self.vertices.values())
+
+    def bfs(self,start):
+        """Level-synchronous breadth first search from start (a Vertex or a key).
+
+        Sets color, distance and predecessor of every vertex like the
+        practical's bfs, but works through the graph one whole frontier at a
+        time with plain lists instead of a queue. Returns the number of levels.
+        """
+        if not isinstance(start,Vertex):
+            start = self.vertices[start]
+        for v in self:
+            v.color = 'white'
+            v.dist = sys.maxsize
+            v.pred = None
+        start.color = 'gray'
+        start.dist = 0
+        frontier = [start]
+        level = 0
+        while frontier:
+            level = level + 1
+            nextFrontier = []
+            for currentVert in frontier:
+                for nbr in currentVert.connectedTo:
+                    if nbr.color == 'white':
+                        nbr.color = 'gray'
+                        nbr.dist = level
+                        nbr.pred = currentVert
+                        nextFrontier.append(nbr)
+                currentVert.color = 'black'
+            frontier = nextFrontier
+        return level
                 
 class Vertex:
     def __init__(self,num):
@@ -360,14 +926,15 @@ class adjGraphTests(unittest.TestCase):
 
 
 class Queue:
+    # a deque makes both ends O(1), a list paid O(n) for every insert(0,item)
     def __init__(self):
-        self.items = []
+        self.items = deque()
 
     def isEmpty(self):
-        return self.items == []
+        return not self.items
     
     def enqueue(self, item):
-        self.items.insert(0,item)
+        self.items.appendleft(item)
 
     def dequeue(self):
         return self.items.pop()
@@ -377,28 +944,42 @@ class Queue:
 				
 
 class PriorityQueue:
+    """A binary min-heap of (priority, item) pairs.
+
+    position maps every item to its index in heapArray and is updated on each
+    swap, so decreaseKey and remove are O(log n) and `in` is O(1) instead of
+    scanning the heap. Items must be hashable and each can be queued once.
+    """
     def __init__(self):
         self.heapArray = [(0,0)]
         self.currentSize = 0
+        self.position = {}
 
     def buildHeap(self,alist):
         self.currentSize = len(alist)
         self.heapArray = [(0,0)]
+        self.position = {}
         for i in alist:
             self.heapArray.append(i)
+            self.position[i[1]] = len(self.heapArray) - 1
         i = len(alist) // 2            
         while (i > 0):
             self.percDown(i)
             i = i - 1
+
+    def swap(self,i,j):
+        self.heapArray[i], self.heapArray[j] = self.heapArray[j], self.heapArray[i]
+        self.position[self.heapArray[i][1]] = i
+        self.position[self.heapArray[j][1]] = j
                         
     def percDown(self,i):
         while (i * 2) <= self.currentSize:
             mc = self.minChild(i)
             if self.heapArray[i][0] > self.heapArray[mc][0]:
-                tmp = self.heapArray[i]
-                self.heapArray[i] = self.heapArray[mc]
-                self.heapArray[mc] = tmp
-            i = mc
+                self.swap(i,mc)
+                i = mc
+            else:
+                break
                 
     def minChild(self,i):
         if i*2 > self.currentSize:
@@ -415,23 +996,51 @@ class PriorityQueue:
     def percUp(self,i):
         while i // 2 > 0:
             if self.heapArray[i][0] < self.heapArray[i//2][0]:
-               tmp = self.heapArray[i//2]
-               self.heapArray[i//2] = self.heapArray[i]
-               self.heapArray[i] = tmp
-            i = i//2
+                self.swap(i,i//2)
+                i = i//2
+            else:
+                break
  
     def add(self,k):
+        # queuing an item that is already in the queue changes its priority
+        if k[1] in self.position:
+            self.changeKey(k[1],k[0])
+            return
         self.heapArray.append(k)
         self.currentSize = self.currentSize + 1
+        self.position[k[1]] = self.currentSize
         self.percUp(self.currentSize)
 
     def delMin(self):
         retval = self.heapArray[1][1]
-        self.heapArray[1] = self.heapArray[self.currentSize]
-        self.currentSize = self.currentSize - 1
-        self.heapArray.pop()
-        self.percDown(1)
+        self.removeAt(1)
         return retval
+
+    def removeAt(self,i):
+        # move the last pair into slot i and let it sift up or down from there
+        del self.position[self.heapArray[i][1]]
+        last = self.heapArray.pop()
+        self.currentSize = self.currentSize - 1
+        if i <= self.currentSize:
+            self.heapArray[i] = last
+            self.position[last[1]] = i
+            self.percUp(i)
+            self.percDown(self.position[last[1]])
+
+    def remove(self,item):
+        """Take item out of the queue and return its priority."""
+        if item not in self.position:
+            raise KeyError(item)
+        i = self.position[item]
+        priority = self.heapArray[i][0]
+        self.removeAt(i)
+        return priority
+
+    def peek(self):
+        """The item with the smallest priority, left in the queue."""
+        if self.currentSize == 0:
+            raise IndexError('peek from an empty queue')
+        return self.heapArray[1][1]
         
     def isEmpty(self):
         if self.currentSize == 0:
@@ -439,25 +1048,22 @@ class PriorityQueue:
         else:
             return False
 
+    def __len__(self):
+        return self.currentSize
+
     def decreaseKey(self,val,amt):
-        # this is a little wierd, but we need to find the heap thing to decrease by
-        # looking at its value
-        done = False
-        i = 1
-        myKey = 0
-        while not done and i <= self.currentSize:
-            if self.heapArray[i][1] == val:
-                done = True
-                myKey = i
-            else:
-                i = i + 1
-        if myKey > 0:
-            self.heapArray[myKey] = (amt,self.heapArray[myKey][1])
-            self.percUp(myKey)
+        if val in self.position:
+            self.changeKey(val,amt)
+
+    def changeKey(self,val,amt):
+        i = self.position[val]
+        old = self.heapArray[i][0]
+        self.heapArray[i] = (amt,val)
+        if amt < old:
+            self.percUp(i)
+        else:
+            self.percDown(i)
             
     def __contains__(self,vtx):
-        for pair in self.heapArray:
-            if pair[1] == vtx:
-                return True
-        return False
+        return vtx in self.position
                            
\ No newline at end of file